@@ -5,7 +5,7 @@ Main entry point for the DevOps Insight PR analysis workflow.
 
 import sys
 import os
-import json
+import orjson
 
 # Add project root to path for imports
 project_root = os.path.abspath(os.path.dirname(__file__))
@@ -68,29 +68,34 @@ def main():
         print("✅ PR analysis workflow created successfully")
         
         # Create initial state
+        pr_id = json_pr_data["pullRequest"]["id"]
         collection_name = json_pr_data["pullRequest"]["repository"]
         state = WorkflowState(
             collection_name=collection_name,
-            pr_data=json.dumps(json_pr_data, indent=2)
+            pr_data=orjson.dumps(json_pr_data).decode()  # Compact: smaller state and prompt
         )
         print(f"✅ Created workflow state for collection: {state.collection_name}")
         
         # Run the workflow
         print("\n🚀 Running PR analysis workflow...")
-        final_state = app.invoke(state, {"configurable": {"thread_id": json_pr_data["pullRequest"]["id"]}})
+        config = {"configurable": {"thread_id": pr_id}}
+        final_state = app.invoke(state, config)
+        
+        # Read the checkpointed state once instead of once per printed field
+        snap = app.get_state(config).values
         
         # Display results
         print("\n" + "=" * 60)
         print("ANALYSIS RESULTS")
         print("=" * 60)
-        print(f"Current step: {app.get_state({'configurable': {'thread_id': json_pr_data['pullRequest']['id']}}).values['current_step']}")
-        print(f"Completed nodes: {app.get_state({'configurable': {'thread_id': json_pr_data['pullRequest']['id']}}).values['completed_nodes']}")
-        if app.get_state({'configurable': {'thread_id': json_pr_data['pullRequest']['id']}}).values['analysis_response']:
-            print(f"Analysis response: {app.get_state({'configurable': {'thread_id': json_pr_data['pullRequest']['id']}}).values['analysis_response'][:500]}...")
+        print(f"Current step: {snap['current_step']}")
+        print(f"Completed nodes: {snap['completion_order']}")
+        if snap['analysis_response']:
+            print(f"Analysis response: {snap['analysis_response'][:500]}...")
         else:
             print("No analysis response generated")
-        if app.get_state({'configurable': {'thread_id': json_pr_data['pullRequest']['id']}}).values['analysis_error']:
-            print(f"Analysis error: {app.get_state({'configurable': {'thread_id': json_pr_data['pullRequest']['id']}}).values['analysis_error']}")
+        if snap['analysis_error']:
+            print(f"Analysis error: {snap['analysis_error']}")
         
         print("\n✅ Workflow execution completed")
         return True
@@ -5,11 +5,12 @@ Provides advanced search capabilities including symbol search, import search, an
 """
 
 import os
+import re
 import sys
 import json
 from dotenv import load_dotenv
 from utils.vector_utils import (
-    StructuredVectorStore,
+    get_default_store,
     search_structured_repository,
     get_structured_collections
 )
@@ -35,19 +36,21 @@ def display_structured_results(results, query, collection_name):
         print("❌ No results found")
         return
     
+    # Collect every line and write them at once instead of one print per line
+    lines = []
     for i, result in enumerate(results, 1):
-        print(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
-        print(f"   🎯 Similarity: {result['similarity_score']:.4f}")
+        lines.append(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
+        lines.append(f"   🎯 Similarity: {result['similarity_score']:.4f}")
         
         # Get language from metadata
         metadata = result.get('metadata', {})
         language = metadata.get('language', 'unknown')
-        print(f"   🔧 Language: {language}")
+        lines.append(f"   🔧 Language: {language}")
         
         # Chunk information
         if result.get('chunk_id') is not None:
             total_chunks = metadata.get('total_chunks', 1)
-            print(f"   📄 Chunk: {result['chunk_id'] + 1}/{total_chunks}")
+            lines.append(f"   📄 Chunk: {result['chunk_id'] + 1}/{total_chunks}")
         
         # Symbol information
         symbols = result.get('symbols', {})
@@ -64,7 +67,7 @@ def display_structured_results(results, query, collection_name):
                     symbol_summary.append(f"{symbol_type}: {preview_str}")
             
             if symbol_summary:
-                print(f"   🧩 Symbols: {' | '.join(symbol_summary)}")
+                lines.append(f"   🧩 Symbols: {' | '.join(symbol_summary)}")
         
         # Import information
         imports = result.get('imports', [])
@@ -74,17 +77,19 @@ def display_structured_results(results, query, collection_name):
                 import_str = f"{', '.join(import_preview)}... (+{len(imports)-3} more)"
             else:
                 import_str = ', '.join(import_preview)
-            print(f"   📦 Imports: {import_str}")
+            lines.append(f"   📦 Imports: {import_str}")
         
         # Metadata
-        print(f"   📊 Size: {metadata.get('size', 0)} chars")
-        print(f"   🏷️  Symbols: {len(symbols)}, Imports: {len(imports)}")
+        lines.append(f"   📊 Size: {metadata.get('size', 0)} chars")
+        lines.append(f"   🏷️  Symbols: {len(symbols)}, Imports: {len(imports)}")
         
         # Match type (if available)
         if 'match_type' in result:
-            print(f"   🎯 Match: {result['match_type']}")
+            lines.append(f"   🎯 Match: {result['match_type']}")
         
-        print("-" * 60)
+        lines.append("-" * 60)
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def semantic_search(collection_name: str, query: str, limit: int = 5, show_content: bool = False):
@@ -103,18 +108,17 @@ def semantic_search(collection_name: str, query: str, limit: int = 5, show_conte
     print(f"🔍 Semantic search in: {collection_name}")
     print(f"📝 Query: {query}")
     
-    store = StructuredVectorStore()
+    store = get_default_store()
     results = store.search_structured_repo(collection_name, query, limit)
     
     display_structured_results(results, query, collection_name)
     
     if show_content and results:
-        print(f"\n📖 Content Preview:")
-        print("=" * 80)
+        lines = [f"\n📖 Content Preview:", "=" * 80]
         
         for i, result in enumerate(results[:3], 1):  # Show content for top 3 results
-            print(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
-            print(f"   🎯 Similarity: {result['similarity_score']:.4f}")
+            lines.append(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
+            lines.append(f"   🎯 Similarity: {result['similarity_score']:.4f}")
             
             content = result.get('content', '')
             if content:
@@ -123,13 +127,15 @@ def semantic_search(collection_name: str, query: str, limit: int = 5, show_conte
                 if len(content) > 300:
                     preview += "..."
                 
-                print(f"   📝 Content:")
-                print("   " + "─" * 60)
+                lines.append(f"   📝 Content:")
+                lines.append("   " + "─" * 60)
                 for line_num, line in enumerate(preview.split('\n')[:10], 1):
-                    print(f"   {line_num:3d} | {line}")
-                print("   " + "─" * 60)
+                    lines.append(f"   {line_num:3d} | {line}")
+                lines.append("   " + "─" * 60)
             else:
-                print("   📝 No content available")
+                lines.append("   📝 No content available")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     
     return results
 
@@ -150,27 +156,31 @@ def symbol_search(collection_name: str, symbol_type: str, symbol_name: str, limi
     print(f"🧩 Symbol search in: {collection_name}")
     print(f"🔍 Looking for {symbol_type}: {symbol_name}")
     
-    store = StructuredVectorStore()
+    store = get_default_store()
     results = store.search_by_symbols(collection_name, symbol_type, symbol_name, limit)
     
     if results:
         print(f"\n✅ Found {len(results)} chunks containing '{symbol_name}'")
+        matches = re.compile(re.escape(symbol_name), re.IGNORECASE).search
         
+        lines = []
         for i, result in enumerate(results, 1):
-            print(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
-            print(f"   🎯 Similarity: {result['similarity_score']:.4f}")
-            print(f"   🏷️  Match: {result.get('match_type', 'unknown')}")
+            lines.append(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
+            lines.append(f"   🎯 Similarity: {result['similarity_score']:.4f}")
+            lines.append(f"   🏷️  Match: {result.get('match_type', 'unknown')}")
             
             # Show the specific symbols found
             symbols = result.get('symbols', {})
             if symbol_type in symbols and symbol_name in symbols[symbol_type]:
-                print(f"   ✅ Exact match in {symbol_type}")
+                lines.append(f"   ✅ Exact match in {symbol_type}")
             
             # Show all symbols of this type
             if symbol_type in symbols:
-                related_symbols = [s for s in symbols[symbol_type] if symbol_name.lower() in s.lower()]
+                related_symbols = [s for s in symbols[symbol_type] if matches(s)]
                 if related_symbols:
-                    print(f"   🔗 Related {symbol_type}: {', '.join(related_symbols[:5])}")
+                    lines.append(f"   🔗 Related {symbol_type}: {', '.join(related_symbols[:5])}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     else:
         print(f"❌ No chunks found containing '{symbol_name}' in {symbol_type}")
     
@@ -192,27 +202,31 @@ def import_search(collection_name: str, import_pattern: str, limit: int = 10):
     print(f"📦 Import search in: {collection_name}")
     print(f"🔍 Looking for imports containing: {import_pattern}")
     
-    store = StructuredVectorStore()
+    store = get_default_store()
     results = store.search_by_imports(collection_name, import_pattern, limit)
     
     if results:
         print(f"\n✅ Found {len(results)} chunks with matching imports")
+        matches = re.compile(re.escape(import_pattern), re.IGNORECASE).search
         
+        lines = []
         for i, result in enumerate(results, 1):
-            print(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
-            print(f"   🎯 Similarity: {result['similarity_score']:.4f}")
+            lines.append(f"\n{i}. 📄 {result['id']}")  # Use 'id' instead of 'file_path'
+            lines.append(f"   🎯 Similarity: {result['similarity_score']:.4f}")
             
             # Show matching imports
             imports = result.get('imports', [])
-            matching_imports = [imp for imp in imports if import_pattern.lower() in imp.lower()]
+            matching_imports = [imp for imp in imports if matches(imp)]
             
             if matching_imports:
-                print(f"   📦 Matching imports:")
+                lines.append(f"   📦 Matching imports:")
                 for imp in matching_imports[:5]:
-                    print(f"      • {imp}")
+                    lines.append(f"      • {imp}")
                 
                 if len(matching_imports) > 5:
-                    print(f"      ... and {len(matching_imports) - 5} more")
+                    lines.append(f"      ... and {len(matching_imports) - 5} more")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     else:
         print(f"❌ No chunks found with imports containing '{import_pattern}'")
     
@@ -230,7 +244,7 @@ def repository_overview(collection_name: str):
     print(f"📊 Repository Overview: {repo_name}")
     print("=" * 50)
     
-    store = StructuredVectorStore()
+    store = get_default_store()
     overview = store.get_repository_overview(collection_name)
     
     if 'error' in overview:
@@ -283,78 +297,79 @@ def interactive_search():
         repo_name = collection.replace('structured_', '')
         print(f"   {i}. {repo_name}")
     
-    # Repository selection
     while True:
-        try:
-            choice = input(f"\nSelect repository (1-{len(collections)}): ").strip()
-            repo_index = int(choice) - 1
+        # Repository selection
+        while True:
+            try:
+                choice = input(f"\nSelect repository (1-{len(collections)}): ").strip()
+                repo_index = int(choice) - 1
+                
+                if 0 <= repo_index < len(collections):
+                    selected_collection = collections[repo_index]
+                    break
+                else:
+                    print(f"❌ Please enter a number between 1 and {len(collections)}")
+            except ValueError:
+                print("❌ Please enter a valid number")
+        
+        repo_name = selected_collection.replace('structured_', '')
+        print(f"\n✅ Selected: {repo_name}")
+        
+        # Search type selection
+        print(f"\n🔍 Search options:")
+        print("1. Semantic search (natural language)")
+        print("2. Symbol search (functions, classes, etc.)")
+        print("3. Import search (dependencies)")
+        print("4. Repository overview")
+        
+        search_type = input("\nSelect search type (1-4): ").strip()
+        
+        if search_type == "1":
+            # Semantic search
+            query = input("\n🔍 Enter search query: ").strip()
+            if not query:
+                print("❌ Query cannot be empty")
+                return
             
-            if 0 <= repo_index < len(collections):
-                selected_collection = collections[repo_index]
-                break
-            else:
-                print(f"❌ Please enter a number between 1 and {len(collections)}")
-        except ValueError:
-            print("❌ Please enter a valid number")
-    
-    repo_name = selected_collection.replace('structured_', '')
-    print(f"\n✅ Selected: {repo_name}")
-    
-    # Search type selection
-    print(f"\n🔍 Search options:")
-    print("1. Semantic search (natural language)")
-    print("2. Symbol search (functions, classes, etc.)")
-    print("3. Import search (dependencies)")
-    print("4. Repository overview")
-    
-    search_type = input("\nSelect search type (1-4): ").strip()
-    
-    if search_type == "1":
-        # Semantic search
-        query = input("\n🔍 Enter search query: ").strip()
-        if not query:
-            print("❌ Query cannot be empty")
-            return
+            limit = int(input("📊 Number of results (default 5): ").strip() or "5")
+            show_content = input("📖 Show content preview? (y/N): ").lower().startswith('y')
+            
+            semantic_search(selected_collection, query, limit, show_content)
         
-        limit = int(input("📊 Number of results (default 5): ").strip() or "5")
-        show_content = input("📖 Show content preview? (y/N): ").lower().startswith('y')
+        elif search_type == "2":
+            # Symbol search
+            print("\n🧩 Symbol types: functions, classes, variables, types, modules")
+            symbol_type = input("Symbol type: ").strip().lower()
+            symbol_name = input("Symbol name: ").strip()
+            
+            if not symbol_type or not symbol_name:
+                print("❌ Both symbol type and name are required")
+                return
+            
+            limit = int(input("📊 Number of results (default 10): ").strip() or "10")
+            symbol_search(selected_collection, symbol_type, symbol_name, limit)
         
-        semantic_search(selected_collection, query, limit, show_content)
-    
-    elif search_type == "2":
-        # Symbol search
-        print("\n🧩 Symbol types: functions, classes, variables, types, modules")
-        symbol_type = input("Symbol type: ").strip().lower()
-        symbol_name = input("Symbol name: ").strip()
+        elif search_type == "3":
+            # Import search
+            import_pattern = input("\n📦 Import pattern to search for: ").strip()
+            if not import_pattern:
+                print("❌ Import pattern cannot be empty")
+                return
+            
+            limit = int(input("📊 Number of results (default 10): ").strip() or "10")
+            import_search(selected_collection, import_pattern, limit)
         
-        if not symbol_type or not symbol_name:
-            print("❌ Both symbol type and name are required")
-            return
+        elif search_type == "4":
+            # Repository overview
+            repository_overview(selected_collection)
         
-        limit = int(input("📊 Number of results (default 10): ").strip() or "10")
-        symbol_search(selected_collection, symbol_type, symbol_name, limit)
-    
-    elif search_type == "3":
-        # Import search
-        import_pattern = input("\n📦 Import pattern to search for: ").strip()
-        if not import_pattern:
-            print("❌ Import pattern cannot be empty")
+        else:
+            print("❌ Invalid search type")
             return
         
-        limit = int(input("📊 Number of results (default 10): ").strip() or "10")
-        import_search(selected_collection, import_pattern, limit)
-    
-    elif search_type == "4":
-        # Repository overview
-        repository_overview(selected_collection)
-    
-    else:
-        print("❌ Invalid search type")
-        return
-    
-    # Ask if user wants to search again
-    if input("\n🔄 Search again? (y/N): ").lower().startswith('y'):
-        interactive_search()
+        # Ask if user wants to search again
+        if not input("\n🔄 Search again? (y/N): ").lower().startswith('y'):
+            break
 
 
 def main():
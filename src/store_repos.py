@@ -6,13 +6,16 @@ Processes repositories and stores them in vector database with enhanced metadata
 
 import os
 import sys
+import asyncio
+import functools
+from typing import Callable, Dict, List
 from dotenv import load_dotenv
 from utils.git_utils import (
-    get_github_repo_info_structured,
-    get_azure_repo_info_structured
+    open_github_repo_structured,
+    open_azure_repo_structured
 )
 from utils.vector_utils import (
-    StructuredVectorStore,
+    get_default_store,
     store_structured_repository,
     get_structured_collections
 )
@@ -21,8 +24,23 @@ from utils.vector_utils import (
 load_dotenv()
 
 
+def _print_repo_stats(repo_data: Dict) -> None:
+    """Print the chunking and symbol statistics gathered while storing."""
+    print(f"📊 Repository processed:")
+    print(f"   Name: {repo_data['repo_name']}")
+    if repo_data.get('source_type') == 'azure_devops':
+        print(f"   Organization: {repo_data.get('organization', 'N/A')}")
+        print(f"   Project: {repo_data.get('project', 'N/A')}")
+    print(f"   Total chunks: {repo_data['chunking_info']['total_chunks']}")
+    print(f"   Files chunked: {repo_data['chunking_info']['files_chunked']}")
+    print(f"   Files whole: {repo_data['chunking_info']['files_not_chunked']}")
+    print(f"   Total symbols: {repo_data['chunking_info']['total_symbols']}")
+    print(f"   Total imports: {repo_data['chunking_info']['total_imports']}")
+
+
 def store_github_repo_structured(github_url: str, branch: str = None, refresh: bool = False,
-                                chunk_size: int = 4000, chunk_overlap: int = 400) -> bool:
+                                chunk_size: int = 4000, chunk_overlap: int = 400,
+                                bulk: bool = False) -> bool:
     """
     Clone and store a GitHub repository with structured data and symbol extraction.
     
@@ -32,6 +50,7 @@ def store_github_repo_structured(github_url: str, branch: str = None, refresh: b
         refresh (bool): Whether to refresh existing collection
         chunk_size (int): Maximum chunk size in characters
         chunk_overlap (int): Overlap between chunks
+        bulk (bool): Drop the vector index during the load and rebuild it afterwards
     
     Returns:
         bool: True if successful, False otherwise
@@ -41,30 +60,12 @@ def store_github_repo_structured(github_url: str, branch: str = None, refresh: b
         print(f"🌿 Branch: {branch}")
     print(f"🔧 Chunking: size={chunk_size}, overlap={chunk_overlap}")
     
-    # Extract structured repository data
-    repo_data = get_github_repo_info_structured(
-        github_url, branch, chunk_size, chunk_overlap
-    )
-    
-    if not repo_data:
-        print("❌ Failed to extract repository data")
-        return False
-    
-    print(f"📊 Repository processed:")
-    print(f"   Name: {repo_data['repo_name']}")
-    print(f"   Total chunks: {repo_data['chunking_info']['total_chunks']}")
-    print(f"   Files chunked: {repo_data['chunking_info']['files_chunked']}")
-    print(f"   Files whole: {repo_data['chunking_info']['files_not_chunked']}")
-    
-    # Count symbols and imports from files
-    total_symbols = sum(sum(len(v) for v in chunk['symbols'].values()) for chunk in repo_data['files'])
-    total_imports = sum(len(chunk['imports']) for chunk in repo_data['files'])
-    print(f"   Total symbols: {total_symbols}")
-    print(f"   Total imports: {total_imports}")
-    
     try:
-        # Store in vector database
-        collection_name = store_structured_repository(repo_data, refresh=refresh)
+        # Chunks are streamed from the clone straight into storage, batch by batch
+        with open_github_repo_structured(github_url, branch, chunk_size, chunk_overlap) as repo_data:
+            collection_name = store_structured_repository(repo_data, refresh=refresh, bulk=bulk)
+        
+        _print_repo_stats(repo_data)
         print(f"✅ Successfully stored in collection: {collection_name}")
         return True
         
@@ -75,7 +76,8 @@ def store_github_repo_structured(github_url: str, branch: str = None, refresh: b
 
 def store_azure_repo_structured(organization: str, project: str, repository: str,
                                branch: str = None, pat: str = None, refresh: bool = False,
-                               chunk_size: int = 4000, chunk_overlap: int = 400) -> bool:
+                               chunk_size: int = 4000, chunk_overlap: int = 400,
+                               bulk: bool = False) -> bool:
     """
     Clone and store an Azure DevOps repository with structured data and symbol extraction.
     
@@ -88,6 +90,7 @@ def store_azure_repo_structured(organization: str, project: str, repository: str
         refresh (bool): Whether to refresh existing collection
         chunk_size (int): Maximum chunk size in characters
         chunk_overlap (int): Overlap between chunks
+        bulk (bool): Drop the vector index during the load and rebuild it afterwards
     
     Returns:
         bool: True if successful, False otherwise
@@ -104,32 +107,14 @@ def store_azure_repo_structured(organization: str, project: str, repository: str
             print("❌ No Azure PAT provided and AZURE_API_KEY not found in environment")
             return False
     
-    # Extract structured repository data
-    repo_data = get_azure_repo_info_structured(
-        organization, project, repository, pat, branch, chunk_size, chunk_overlap
-    )
-    
-    if not repo_data:
-        print("❌ Failed to extract repository data")
-        return False
-    
-    print(f"📊 Repository processed:")
-    print(f"   Name: {repo_data['repo_name']}")
-    print(f"   Organization: {repo_data.get('organization', 'N/A')}")
-    print(f"   Project: {repo_data.get('project', 'N/A')}")
-    print(f"   Total chunks: {repo_data['chunking_info']['total_chunks']}")
-    print(f"   Files chunked: {repo_data['chunking_info']['files_chunked']}")
-    print(f"   Files whole: {repo_data['chunking_info']['files_not_chunked']}")
-    
-    # Count symbols and imports from files
-    total_symbols = sum(sum(len(v) for v in chunk['symbols'].values()) for chunk in repo_data['files'])
-    total_imports = sum(len(chunk['imports']) for chunk in repo_data['files'])
-    print(f"   Total symbols: {total_symbols}")
-    print(f"   Total imports: {total_imports}")
-    
     try:
-        # Store in vector database
-        collection_name = store_structured_repository(repo_data, refresh=refresh)
+        # Chunks are streamed from the clone straight into storage, batch by batch
+        with open_azure_repo_structured(
+            organization, project, repository, pat, branch, chunk_size, chunk_overlap
+        ) as repo_data:
+            collection_name = store_structured_repository(repo_data, refresh=refresh, bulk=bulk)
+        
+        _print_repo_stats(repo_data)
         print(f"✅ Successfully stored in collection: {collection_name}")
         return True
         
@@ -138,6 +123,34 @@ def store_azure_repo_structured(organization: str, project: str, repository: str
         return False
 
 
+async def run_concurrently(jobs: List[Callable[[], bool]], concurrency: int = 4) -> List[bool]:
+    """
+    Run independent repository ingests at the same time.
+    
+    Each job runs in a worker thread, so clones and embedding requests of different
+    repositories overlap; at most `concurrency` run at once to avoid rate limits.
+    Each running ingest starts its own parse pool of up to MAX_POOL_WORKERS processes,
+    and ingests of the same remote take turns on its git mirror.
+    
+    Progress output of concurrent jobs interleaves: per-repository lines come out
+    in arbitrary order, so label anything printed before the jobs start.
+    
+    Args:
+        jobs (List[Callable[[], bool]]): Zero-argument store calls
+        concurrency (int): Maximum number of ingests in flight
+        
+    Returns:
+        List[bool]: Result of each job, in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run(job: Callable[[], bool]) -> bool:
+        async with semaphore:
+            return await asyncio.to_thread(job)
+    
+    return await asyncio.gather(*(run(job) for job in jobs))
+
+
 def list_stored_repositories():
     """List all stored structured repositories."""
     print("📋 Stored Structured Repositories:")
@@ -150,7 +163,7 @@ def list_stored_repositories():
             print("   No structured repositories found")
             return
         
-        store = StructuredVectorStore()
+        store = get_default_store()
         
         for i, collection in enumerate(collections, 1):
             print(f"\n{i}. {collection}")
@@ -211,8 +224,13 @@ def interactive_storage():
         )
 
 
-def main():
-    """Main function with example repository configurations."""
+def main(bulk: bool = False):
+    """
+    Main function with example repository configurations.
+    
+    Args:
+        bulk (bool): Load repositories in bulk mode (index rebuilt once per repository)
+    """
     print("🚀 Structured Repository Storage")
     print("=" * 50)
     
@@ -225,33 +243,44 @@ def main():
         print("❌ OPENAI_API_KEY environment variable not set")
         sys.exit(1)
     
+    if bulk:
+        # Recover indexes left dropped by an interrupted bulk load
+        get_default_store().ensure_vector_indexes()
+    
     # List existing collections
     list_stored_repositories()
     
     print("\n" + "=" * 50)
     
-    # Example 1: GitHub Repository
+    # Both example repositories are independent, so ingest them concurrently; both headers
+    # are printed up front and the per-repo progress and stats below interleave
     print("\n1️⃣ Storing GitHub Repository (Structured)")
-    github_success = store_github_repo_structured(
-        github_url="https://github.com/M-Mowina/LinkedIn-Booster",
-        branch=None,
-        refresh=True,
-        chunk_size=4000,
-        chunk_overlap=400
-    )
-    
-    # Example 2: Azure DevOps Repository
-    print("\n2️⃣ Storing Azure DevOps Repository (Structured)")
-    azure_success = store_azure_repo_structured(
-        organization="areebgroup",
-        project="Internship-Playground",
-        repository="Internship-ai",
-        branch="Linked-Booster-LangGraph-Task",
-        pat=None,  # Will use AZURE_API_KEY from environment
-        refresh=True,
-        chunk_size=4000,
-        chunk_overlap=400
-    )
+    print("2️⃣ Storing Azure DevOps Repository (Structured)")
+    github_success, azure_success = asyncio.run(run_concurrently([
+        # Example 1: GitHub Repository
+        functools.partial(
+            store_github_repo_structured,
+            github_url="https://github.com/M-Mowina/LinkedIn-Booster",
+            branch=None,
+            refresh=True,
+            chunk_size=4000,
+            chunk_overlap=400,
+            bulk=bulk
+        ),
+        # Example 2: Azure DevOps Repository
+        functools.partial(
+            store_azure_repo_structured,
+            organization="areebgroup",
+            project="Internship-Playground",
+            repository="Internship-ai",
+            branch="Linked-Booster-LangGraph-Task",
+            pat=None,  # Will use AZURE_API_KEY from environment
+            refresh=True,
+            chunk_size=4000,
+            chunk_overlap=400,
+            bulk=bulk
+        )
+    ]))
     
     # Summary
     print("\n" + "=" * 50)
@@ -271,10 +300,13 @@ if __name__ == "__main__":
             interactive_storage()
         elif sys.argv[1] == "--list":
             list_stored_repositories()
+        elif sys.argv[1] == "--bulk":
+            main(bulk=True)
         else:
             print("Usage:")
             print("  python store_repos.py                    # Run examples")
             print("  python store_repos.py --interactive      # Interactive mode")
             print("  python store_repos.py --list             # List stored repos")
+            print("  python store_repos.py --bulk             # Run examples, rebuilding indexes after each load")
     else:
         main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Persistent cache of processed file chunks keyed by content hash.
+Lets re-ingests of unchanged files skip symbol extraction and splitting.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Any
+import orjson
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "devops-insight", "chunks.sqlite3")
+
+# Bumped whenever the serialized chunk format or symbol extraction changes, so stale entries are never loaded
+CACHE_FORMAT_VERSION = 4
+
+
+def chunk_key(file_path: str, content: str, repo_id: str, chunk_size: int,
+              chunk_overlap: int, language_name: str) -> str:
+    """Build the cache key for one file's processing inputs."""
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    # Path and repo are part of the key because they are baked into the chunk IDs
+    return f"v{CACHE_FORMAT_VERSION}|{content_hash}|{file_path}|{repo_id}|{chunk_size}|{chunk_overlap}|{language_name}"
+
+
+class ChunkCache:
+    """SQLite-backed store of process_file_structured results, serialized as JSON."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("CHUNK_CACHE_PATH", DEFAULT_CACHE_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Several worker processes write at once; wait for the lock instead of failing
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, payload BLOB)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached chunks for a key as field dicts, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM cache WHERE key = ?", (key,)).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def put(self, key: str, chunks: List[Any]) -> None:
+        """Store the chunks (dataclasses) produced for a key."""
+        # orjson serializes dataclasses natively and is faster than pickle for this string-heavy payload
+        payload = orjson.dumps(chunks)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cache (key, payload) VALUES (?, ?)", (key, payload))
+            self._conn.commit()
+
+
+# Per-process instance; SQLite connections must not be shared across fork()
+_chunk_cache: Optional[ChunkCache] = None
+_chunk_cache_pid: Optional[int] = None
+_chunk_cache_lock = threading.Lock()
+
+
+def get_chunk_cache() -> ChunkCache:
+    """Return this process's chunk cache, creating it on first use."""
+    global _chunk_cache, _chunk_cache_pid
+    with _chunk_cache_lock:
+        if _chunk_cache is None or _chunk_cache_pid != os.getpid():
+            _chunk_cache = ChunkCache()
+            _chunk_cache_pid = os.getpid()
+        return _chunk_cache
@@ -0,0 +1,150 @@
+"""
+Persistent embedding cache keyed by content hash.
+Skips the embedding API round-trip for texts that have already been embedded with the same model.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+import numpy as np
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "devops-insight", "embeddings.sqlite3")
+
+# Vectors kept in memory in front of SQLite (about 6 MB at 1536 dimensions)
+MEMORY_CACHE_SIZE = 1024
+
+
+def content_key(text: str, model: str) -> bytes:
+    """Build the cache key for a (model, text) pair."""
+    return hashlib.sha256(f"{model}\x00{text}".encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+    """SQLite-backed store of embeddings, stored as packed float32 blobs, with a small in-memory LRU in front."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (sha256 BLOB PRIMARY KEY, vec BLOB)")
+        self._conn.commit()
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        """Add a vector to the in-memory LRU, evicting the oldest one when full."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return cached vectors for the given keys (missing keys are omitted)."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            keys = [key for key in keys if key not in found]
+            
+            # Stay under SQLite's default bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT sha256, vec FROM embeddings WHERE sha256 IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, found[key])
+        return found
+
+    def put_many(self, items: Dict[bytes, Any]) -> None:
+        """Store vectors for the given keys."""
+        if not items:
+            return
+
+        blobs = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+        with self._lock:
+            for key, blob in blobs:
+                # Read-only view like the vectors loaded from SQLite, so it can be shared safely
+                self._remember(key, np.frombuffer(blob, dtype=np.float32))
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (sha256, vec) VALUES (?, ?)", blobs)
+            self._conn.commit()
+
+
+class CachedEmbeddings:
+    """Wraps an embeddings model so embed calls consult the cache before the API."""
+
+    def __init__(self, embeddings: Any, model: str, cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache or get_embedding_cache()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, texts: List[str]):
+        """Split texts into cached vectors and the indexes that still need embedding."""
+        keys = [content_key(text, self.model) for text in texts]
+        cached = self.cache.get_many(list(set(keys)))
+        vectors: List[Optional[List[float]]] = [cached.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return keys, vectors, missing
+
+    def _store(self, keys, vectors, missing, computed) -> List[List[float]]:
+        """Fill in freshly computed vectors and write them back to the cache."""
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+        self.cache.put_many({keys[i]: vectors[i] for i in missing})
+        return vectors
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Return how many texts were served from the cache and how many had to be embedded."""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, calling the model only for cache misses."""
+        keys, vectors, missing = self._lookup(texts)
+        computed = self.embeddings.embed_documents([texts[i] for i in missing]) if missing else []
+        return self._store(keys, vectors, missing, computed)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of embed_documents."""
+        keys, vectors, missing = self._lookup(texts)
+        computed = await self.embeddings.aembed_documents([texts[i] for i in missing]) if missing else []
+        return self._store(keys, vectors, missing, computed)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, calling the model only on a cache miss."""
+        keys, vectors, missing = self._lookup([text])
+        computed = [self.embeddings.embed_query(text)] if missing else []
+        return self._store(keys, vectors, missing, computed)[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async variant of embed_query."""
+        keys, vectors, missing = self._lookup([text])
+        computed = [await self.embeddings.aembed_query(text)] if missing else []
+        return self._store(keys, vectors, missing, computed)[0]
+
+
+# Global instance, shared by every vector store in the process
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, creating it on first use."""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache()
+        return _embedding_cache
@@ -0,0 +1,127 @@
+"""
+In-memory semantic cache of search results.
+Near-identical queries (by embedding similarity) reuse earlier results instead of hitting the database.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
+
+
+# Minimum cosine similarity between query embeddings for a cached result to be reused
+SIMILARITY_THRESHOLD = 0.97
+
+# Seconds a cached result stays valid
+QUERY_CACHE_TTL = 300
+
+# Cached queries kept per search scope (collection, limit, filters)
+MAX_ENTRIES_PER_SCOPE = 64
+
+
+class SemanticQueryCache:
+    """Search results keyed by scope, matched by the cosine similarity of their query embeddings."""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, ttl: float = QUERY_CACHE_TTL,
+                 max_entries: int = MAX_ENTRIES_PER_SCOPE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        # collection name -> write version; scopes cached under an older version are stale
+        self._versions: Dict[str, int] = {}
+        # scope -> (collection version, query text -> (unit query embedding, time stored, results), oldest first)
+        self._scopes: Dict[Tuple, Tuple[int, "OrderedDict[str, Tuple[np.ndarray, float, List[Dict[str, Any]]]]"]] = {}
+
+    def version(self, collection_name: str) -> int:
+        """Return the current write version of a collection; read it before querying the database."""
+        with self._lock:
+            return self._versions.get(collection_name, 0)
+
+    def _entries(self, scope: Tuple) -> Optional["OrderedDict[str, Tuple[np.ndarray, float, List[Dict[str, Any]]]]"]:
+        """Return a scope's entries if they were cached under the collection's current version."""
+        cached = self._scopes.get(scope)
+        if cached is None:
+            return None
+        version, entries = cached
+        if version != self._versions.get(scope[0], 0):
+            del self._scopes[scope]
+            self.evictions += len(entries)
+            return None
+        return entries
+
+    def get(self, scope: Tuple, query: str, embedding: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        """Return copies of the results of the most similar cached query in scope, or None."""
+        unit = _normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries(scope)
+            if not entries:
+                self.misses += 1
+                return None
+
+            stale = [text for text, (_, stored_at, _) in entries.items() if now - stored_at > self.ttl]
+            for text in stale:
+                del entries[text]
+            self.evictions += len(stale)
+            if not entries:
+                self.misses += 1
+                return None
+
+            texts = list(entries)
+            similarities = np.stack([entries[text][0] for text in texts]) @ unit
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entries.move_to_end(texts[best])
+            results = entries[texts[best]][2]
+        # Callers annotate results (e.g. match_type), so each gets its own dicts
+        return [dict(result) for result in results]
+
+    def put(self, scope: Tuple, query: str, embedding: np.ndarray, results: List[Dict[str, Any]],
+            version: int) -> None:
+        """
+        Remember the results of a query in a scope, evicting the oldest entry when full.
+
+        version is the collection version read before the results were queried; results
+        that a write has overtaken in the meantime are dropped instead of cached.
+        """
+        entry = (_normalize(embedding), time.monotonic(), [dict(result) for result in results])
+        with self._lock:
+            if version != self._versions.get(scope[0], 0):
+                return
+            entries = self._entries(scope)
+            if entries is None:
+                entries = OrderedDict()
+                self._scopes[scope] = (version, entries)
+            entries[query] = entry
+            entries.move_to_end(query)
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many lookups were answered from the cache, missed, and how many entries were evicted."""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def invalidate(self, collection_name: str) -> None:
+        """Make every cached result for a collection stale, e.g. after it is written to."""
+        # Bumping the version is O(1); stale scopes are dropped when next touched
+        with self._lock:
+            self._versions[collection_name] = self._versions.get(collection_name, 0) + 1
+
+
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    """Scale an embedding to unit length so dot products are cosine similarities."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,103 @@
+"""
+Persistent cache of extracted symbols keyed by content hash.
+Lets repeated analysis of unchanged files skip tree-sitter parsing entirely.
+"""
+
+import os
+import sqlite3
+import hashlib
+import mmap
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+import orjson
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "devops-insight", "symbols.sqlite3")
+
+# Bumped whenever symbol extraction changes, so stale entries are never loaded
+CACHE_FORMAT_VERSION = 1
+
+# Entries kept in memory in front of SQLite
+MEMORY_CACHE_SIZE = 1024
+
+
+def symbols_key(code: Union[str, bytes, mmap.mmap], language: str) -> bytes:
+    """Build the cache key for one piece of code, given as text or as UTF-8 encoded bytes."""
+    digest = hashlib.sha256(f"v{CACHE_FORMAT_VERSION}\x00{language}\x00".encode('utf-8'))
+    # Encoded buffers (e.g. mapped files) are hashed in place and key the same as the equivalent str
+    digest.update(code.encode('utf-8') if isinstance(code, str) else code)
+    return digest.digest()
+
+
+class SymbolCache:
+    """SQLite-backed store of extract_symbols results, with a small in-memory LRU in front."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("SYMBOL_CACHE_PATH", DEFAULT_CACHE_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[bytes, Dict[str, Tuple[str, ...]]]" = OrderedDict()
+        # Autocommit; several worker processes may write at once
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS symbols (hash BLOB PRIMARY KEY, path TEXT, payload BLOB)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path)")
+
+    def _remember(self, key: bytes, symbols: Dict[str, Tuple[str, ...]]) -> None:
+        """Add an entry to the in-memory LRU, evicting the oldest one when full."""
+        self._memory[key] = symbols
+        self._memory.move_to_end(key)
+        if len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    def get(self, key: bytes) -> Optional[Dict[str, Tuple[str, ...]]]:
+        """Return a copy of the cached symbols for a key, or None on a miss."""
+        with self._lock:
+            symbols = self._memory.get(key)
+            if symbols is None:
+                row = self._conn.execute("SELECT payload FROM symbols WHERE hash = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                symbols = {symbol_type: tuple(names) for symbol_type, names in orjson.loads(row[0]).items()}
+            self._remember(key, symbols)
+        # The buckets are immutable tuples and shared; only the mapping itself is copied
+        return dict(symbols)
+
+    def put(self, key: bytes, symbols: Dict[str, Tuple[str, ...]], file_path: Optional[str] = None) -> None:
+        """Store the symbols extracted for a key."""
+        symbols = dict(symbols)
+        with self._lock:
+            self._remember(key, symbols)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO symbols (hash, path, payload) VALUES (?, ?, ?)",
+                (key, file_path, orjson.dumps(symbols))
+            )
+
+    def invalidate(self, file_path: str) -> None:
+        """Drop every entry recorded for a file, e.g. when a file watcher sees it change."""
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT hash FROM symbols WHERE path = ?", (file_path,))]
+            for key in keys:
+                self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM symbols WHERE path = ?", (file_path,))
+
+
+# Per-process instance; SQLite connections must not be shared across fork()
+_symbol_cache: Optional[SymbolCache] = None
+_symbol_cache_pid: Optional[int] = None
+_symbol_cache_lock = threading.Lock()
+
+
+def get_symbol_cache() -> SymbolCache:
+    """Return this process's symbol cache, creating it on first use."""
+    global _symbol_cache, _symbol_cache_pid
+    with _symbol_cache_lock:
+        if _symbol_cache is None or _symbol_cache_pid != os.getpid():
+            _symbol_cache = SymbolCache()
+            _symbol_cache_pid = os.getpid()
+        return _symbol_cache
@@ -1,20 +1,37 @@
 """
 Multi-language symbol extractor using tree-sitter.
 Extracts imports, functions, classes, and other symbols from various programming languages.
+
+Parsing is dominated by small allocations; for large batches, preload a faster allocator:
+    LD_PRELOAD=/usr/lib/x86_64-linux-gnu/libmimalloc.so python src/store_repos.py
 """
 
 import os
-from typing import Dict, List, Optional, Any
+import re
+import importlib
+import importlib.util
+import gc
+import mmap
+import multiprocessing
+import sys
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
 from langchain_text_splitters import Language
+from .symbol_cache import symbols_key, get_symbol_cache
 
 # Tree-sitter language imports
 try:
     import tree_sitter_python as tspython
-    from tree_sitter import Language as TSLanguage, Parser, Node
+    from tree_sitter import Language as TSLanguage, Parser, Node, Query, QueryCursor, QueryError
     TREE_SITTER_AVAILABLE = True
-except ImportError:
+except ImportError as e:
+    # Query/QueryCursor only exist from tree-sitter 0.25; older installs land here too
     TREE_SITTER_AVAILABLE = False
-    print("⚠️  tree-sitter not available. Install with: pip install tree-sitter tree-sitter-python")
+    print(f"⚠️  tree-sitter >= 0.25 not available ({e}); falling back to regex symbol extraction. "
+          "Install with: pip install 'tree-sitter>=0.25' 'tree-sitter-python>=0.23'")
 
 # Additional language imports (install as needed)
 LANGUAGE_MODULES = {
@@ -34,605 +51,553 @@ LANGUAGE_MODULES = {
 }
 
 
+# Tree-sitter query patterns per language, grouped by symbol bucket (in output order).
+# Capture names are the bucket names; a ".declarator" suffix marks C/C++ function
+# declarators whose name identifier is resolved in Python.
+SYMBOL_QUERIES = {
+    'python': {
+        'imports': ['(import_statement) @imports', '(import_from_statement) @imports'],
+        'functions': ['(function_definition name: (identifier) @functions)'],
+        'classes': ['(class_definition name: (identifier) @classes)'],
+        # Module-level assignments only
+        'variables': ['(module (expression_statement (assignment left: (identifier) @variables)))'],
+        'decorators': ['(decorator) @decorators'],
+    },
+    'javascript': {
+        'imports': ['(import_statement) @imports'],
+        'functions': ['(function_declaration name: (_) @functions)'],
+        'classes': ['(class_declaration name: (_) @classes)'],
+        'variables': ['(variable_declaration (variable_declarator name: (_) @variables))'],
+        'exports': ['(export_statement) @exports'],
+    },
+    'java': {
+        'imports': ['(import_declaration) @imports'],
+        'functions': ['(method_declaration name: (_) @functions)'],
+        'classes': ['(class_declaration name: (_) @classes)'],
+        'interfaces': ['(interface_declaration name: (_) @interfaces)'],
+        'packages': ['(package_declaration) @packages'],
+    },
+    'c': {
+        'includes': ['(preproc_include) @includes'],
+        'functions': ['(function_definition declarator: (_) @functions.declarator)'],
+        'classes': ['(class_specifier name: (_) @classes)'],
+        'structs': ['(struct_specifier name: (_) @structs)'],
+        'defines': ['(preproc_def) @defines'],
+    },
+    'go': {
+        'imports': ['(import_spec) @imports'],
+        'functions': ['(function_declaration name: (_) @functions)'],
+        'types': ['(type_declaration (type_spec name: (_) @types))',
+                  '(type_declaration (type_alias name: (_) @types))'],
+        'variables': ['(var_declaration) @variables'],
+        'constants': ['(const_declaration) @constants'],
+    },
+    'rust': {
+        'uses': ['(use_declaration) @uses'],
+        'functions': ['(function_item name: (_) @functions)'],
+        'structs': ['(struct_item name: (_) @structs)'],
+        'enums': ['(enum_item name: (_) @enums)'],
+        'traits': ['(trait_item name: (_) @traits)'],
+        'impls': ['(impl_item) @impls'],
+    },
+    'ruby': {
+        'requires': ['((call !receiver method: (identifier) @_method) @requires (#eq? @_method "require"))'],
+        'functions': ['(method name: (_) @functions)'],
+        'classes': ['(class name: (_) @classes)'],
+        'modules': ['(module name: (_) @modules)'],
+        'constants': [],
+    },
+    'php': {
+        'includes': ['(include_expression) @includes', '(require_expression) @includes'],
+        'functions': ['(function_definition name: (_) @functions)'],
+        'classes': ['(class_declaration name: (_) @classes)'],
+        'interfaces': ['(interface_declaration name: (_) @interfaces)'],
+        'traits': ['(trait_declaration name: (_) @traits)'],
+        'namespaces': ['(namespace_definition name: (_) @namespaces)'],
+    },
+    'csharp': {
+        'usings': ['(using_directive) @usings'],
+        'functions': ['(method_declaration name: (_) @functions)'],
+        'classes': ['(class_declaration name: (_) @classes)'],
+        'interfaces': ['(interface_declaration name: (_) @interfaces)'],
+        'namespaces': ['(namespace_declaration name: (_) @namespaces)'],
+    },
+    'swift': {
+        'imports': ['(import_declaration) @imports'],
+        'functions': ['(function_declaration name: (_) @functions)'],
+        'classes': ['(class_declaration name: (_) @classes)'],
+        'structs': ['(struct_declaration name: (_) @structs)'],
+        'protocols': ['(protocol_declaration name: (_) @protocols)'],
+        'extensions': ['(extension_declaration) @extensions'],
+    },
+    'kotlin': {
+        'imports': ['(import_header) @imports'],
+        'functions': ['(function_declaration name: (_) @functions)'],
+        'classes': ['(class_declaration name: (_) @classes)'],
+        'interfaces': ['(interface_declaration name: (_) @interfaces)'],
+        'objects': ['(object_declaration name: (_) @objects)'],
+        'packages': ['(package_header) @packages'],
+    },
+}
+SYMBOL_QUERIES['typescript'] = SYMBOL_QUERIES['javascript']
+SYMBOL_QUERIES['cpp'] = SYMBOL_QUERIES['c']
+
+# Used for languages without their own patterns
+GENERIC_SYMBOL_QUERY = {
+    'identifiers': ['(identifier) @identifiers'],
+    'strings': ['(string) @strings'],
+    'comments': ['(comment) @comments'],
+}
+
+# File extension (lowercase, without the dot) -> language name
+EXTENSION_LANGUAGES = {
+    'py': 'python',
+    'js': 'javascript',
+    'jsx': 'javascript',
+    'ts': 'typescript',
+    'tsx': 'typescript',
+    'java': 'java',
+    'cpp': 'cpp',
+    'cc': 'cpp',
+    'cxx': 'cpp',
+    'c': 'c',
+    'h': 'c',
+    'hpp': 'cpp',
+    'cs': 'csharp',
+    'go': 'go',
+    'rs': 'rust',
+    'rb': 'ruby',
+    'php': 'php',
+    'swift': 'swift',
+    'kt': 'kotlin',
+}
+
+# Most symbols the regex fallback collects from one file
+MAX_FALLBACK_MATCHES = 10000
+
+# Bytes handed to tree-sitter per read callback when parsing a mapped file
+PARSE_READ_SIZE = 64 * 1024
+
+# Maximum number of distinct captured strings remembered for interning
+INTERN_TABLE_SIZE = 100000
+
+# Buckets that record a fixed marker per match instead of the matched text
+CAPTURE_LITERALS = {
+    'impls': 'impl block',
+    'extensions': 'extension',
+}
+
+
+def _compile_symbol_query(language: 'TSLanguage', buckets: Dict[str, List[str]]) -> 'Query':
+    """Compile the patterns that are valid for this grammar into a single query."""
+    valid_patterns = []
+    for patterns in buckets.values():
+        for pattern in patterns:
+            try:
+                Query(language, pattern)
+            except QueryError:
+                # Node type or field not in this grammar: the pattern could never match
+                continue
+            valid_patterns.append(pattern)
+    return Query(language, "\n".join(valid_patterns))
+
+
+# Language name -> (grammar, symbol query, capture name -> (bucket, kind)), shared by every extractor
+_GRAMMARS: Dict[str, Tuple['TSLanguage', 'Query', Dict[str, Tuple[str, str]]]] = {}
+_grammars_lock = threading.Lock()
+
+
+def _load_grammar(language: str, module_name: str) -> Tuple['TSLanguage', 'Query', Dict[str, Tuple[str, str]]]:
+    """Import a grammar and compile its symbol query, once per process."""
+    with _grammars_lock:
+        grammar = _GRAMMARS.get(language)
+        if grammar is None:
+            ts_language = TSLanguage(importlib.import_module(module_name).language())
+            buckets = SYMBOL_QUERIES.get(language, GENERIC_SYMBOL_QUERY)
+            query = _compile_symbol_query(ts_language, buckets)
+            
+            # Capture names are split once here rather than for every extraction;
+            # helper captures used only by predicates belong to no bucket and are left out
+            capture_buckets = {}
+            for index in range(query.capture_count):
+                bucket, _, kind = query.capture_name(index).partition('.')
+                if bucket in buckets:
+                    capture_buckets[query.capture_name(index)] = (bucket, kind)
+            
+            grammar = _GRAMMARS[language] = (ts_language, query, capture_buckets)
+        return grammar
+
+
+# Regex patterns used when tree-sitter cannot parse a language; a pattern's first
+# group, if it has one, is the symbol name, otherwise the whole match is recorded
+FALLBACK_PATTERNS = {
+    'python': {
+        'imports': [
+            r'^import\s+[\w\.]+(?:\s+as\s+\w+)?',
+            r'^from\s+[\w\.]+\s+import\s+.+'
+        ],
+        'functions': [r'^def\s+(\w+)\s*\('],
+        'classes': [r'^class\s+(\w+)(?:\s*\(.*?\))?:']
+    },
+    'javascript': {
+        'imports': [
+            r'import\s+.*?from\s+[\'"][^\'"]+[\'"]',
+            r'const\s+.*?=\s+require\([\'"][^\'"]+[\'"]\)'
+        ],
+        'functions': [
+            r'function\s+(\w+)\s*\(',
+            r'(\w+)\s*=\s*(?:async\s+)?(?:function|\([^)]*\)\s*=>)'
+        ],
+        'classes': [r'class\s+(\w+)(?:\s+extends\s+\w+)?\s*\{']
+    }
+}
+
+
+# Languages whose fallback patterns can share one scan: each anchors at a line start on a
+# different keyword, so no match can hide another. Elsewhere, patterns overlap (e.g.
+# `const f = function g(` holds two function names) and each gets a scan of its own
+FALLBACK_SINGLE_SCAN = frozenset({'python'})
+
+
+def _compile_fallback_scans(buckets: Dict[str, List[str]], single_scan: bool
+                            ) -> Tuple[List[Tuple['re.Pattern', Dict[int, Tuple[int, int]]]], List[str]]:
+    """
+    Compile a language's fallback patterns into the regexes that scan the source.
+    
+    Returns:
+        Tuple[List[Tuple[re.Pattern, Dict[int, Tuple[int, int]]]], List[str]]: Each scan's regex,
+        with, for the group index of each of its alternatives, the pattern's position and the
+        group holding the recorded text; and the symbol type of each pattern, in order
+    """
+    scans = []
+    parts = []
+    alternatives = {}
+    group_index = 1
+    symbol_types = []
+    for symbol_type, patterns in buckets.items():
+        for pattern in patterns:
+            inner_groups = re.compile(pattern).groups
+            alternatives[group_index] = (len(symbol_types), group_index + 1 if inner_groups else group_index)
+            parts.append(f"({pattern})")
+            group_index += 1 + inner_groups
+            symbol_types.append(symbol_type)
+            if not single_scan:
+                scans.append((re.compile(parts[0], re.MULTILINE), alternatives))
+                parts, alternatives, group_index = [], {}, 1
+    if parts:
+        scans.append((re.compile("|".join(parts), re.MULTILINE), alternatives))
+    return scans, symbol_types
+
+
+FALLBACK_REGEXES = {language: _compile_fallback_scans(buckets, language in FALLBACK_SINGLE_SCAN)
+                    for language, buckets in FALLBACK_PATTERNS.items()}
+
+
+@dataclass(slots=True)
+class SymbolSpans:
+    """One bucket's symbols as byte offsets into the source; text is decoded only when indexed."""
+    buf: 'bytes | mmap.mmap'
+    starts: np.ndarray                  # int32 start offsets, one per symbol
+    ends: np.ndarray                    # int32 end offsets, one per symbol
+    literal: Optional[str] = None       # Fixed marker returned for every symbol of literal buckets
+    
+    @classmethod
+    def from_strings(cls, names: Tuple[str, ...]) -> 'SymbolSpans':
+        """Build spans over already-decoded names, e.g. results of the regex fallback."""
+        encoded = [name.encode('utf-8') for name in names]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int32, count=len(encoded))
+        ends = np.cumsum(lengths, dtype=np.int32)
+        return cls(b''.join(encoded), ends - lengths, ends)
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def __getitem__(self, index: int) -> str:
+        if self.literal is not None:
+            return self.literal
+        return self.buf[self.starts[index]:self.ends[index]].decode('utf-8').strip()
+    
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
 class SymbolExtractor:
     """Multi-language symbol extractor using tree-sitter."""
     
     def __init__(self):
+        # Grammars are loaded on first use, so only the languages a run touches are paid for
         self.parsers = {}
         self.languages = {}
-        self._initialize_languages()
+        self.queries = {}
+        self.capture_buckets = {}
+        self._unavailable = set()
+        
+        # Parsers are not thread-safe, so every thread gets its own
+        self._local = threading.local()
+        
+        # Captured bytes -> interned str, so names repeated across files share one object
+        self._intern: Dict[bytes, str] = {}
     
-    def _initialize_languages(self):
-        """Initialize available tree-sitter languages."""
-        if not TREE_SITTER_AVAILABLE:
-            return
+    def _ensure_language(self, language: str) -> bool:
+        """Load a tree-sitter grammar and its symbol query the first time it is needed."""
+        if language in self.parsers:
+            return True
+        if not TREE_SITTER_AVAILABLE or language in self._unavailable:
+            return False
+        
+        module_name = LANGUAGE_MODULES.get(language)
+        if not module_name:
+            return False
         
-        # Initialize Python (most commonly available)
         try:
-            self.languages['python'] = TSLanguage(tspython.language())
-            self.parsers['python'] = Parser(self.languages['python'])
+            ts_language, query, capture_buckets = _load_grammar(language, module_name)
+        except ImportError:
+            # Language module not installed
+            self._unavailable.add(language)
+            return False
         except Exception as e:
-            print(f"⚠️  Failed to initialize Python parser: {e}")
+            print(f"⚠️  Failed to initialize {language} parser: {e}")
+            self._unavailable.add(language)
+            return False
         
-        # Try to initialize other languages
-        for lang_name, module_name in LANGUAGE_MODULES.items():
-            if lang_name == 'python':  # Already handled
-                continue
-            
-            try:
-                module = __import__(module_name)
-                self.languages[lang_name] = TSLanguage(module.language())
-                self.parsers[lang_name] = Parser(self.languages[lang_name])
-            except ImportError:
-                # Language module not installed
-                continue
-            except Exception as e:
-                print(f"⚠️  Failed to initialize {lang_name} parser: {e}")
+        self.languages[language] = ts_language
+        self.queries[language] = query
+        self.capture_buckets[language] = capture_buckets
+        self.parsers[language] = Parser(ts_language)
+        return True
     
     def get_language_from_extension(self, file_path: str) -> Optional[str]:
         """Map file extension to language name."""
-        ext = os.path.splitext(file_path)[1].lower()
-        
-        extension_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.jsx': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'typescript',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.cc': 'cpp',
-            '.cxx': 'cpp',
-            '.c': 'c',
-            '.h': 'c',
-            '.hpp': 'cpp',
-            '.cs': 'csharp',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.rb': 'ruby',
-            '.php': 'php',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-        }
-        
-        return extension_map.get(ext)
+        # Same result as os.path.splitext for '/'-separated paths: leading dots of the name don't start an extension
+        _, dot, ext = file_path.rpartition('/')[2].lstrip('.').rpartition('.')
+        return EXTENSION_LANGUAGES.get(ext.lower()) if dot else None
     
-    def extract_symbols(self, code: str, language: str) -> Dict[str, List[str]]:
+    def extract_symbols(self, code: str, language: str, file_path: Optional[str] = None) -> Dict[str, Tuple[str, ...]]:
         """
         Extract symbols from code using tree-sitter.
         
+        Results are cached by content hash, so unchanged code is never parsed twice.
+        
         Args:
             code (str): Source code
             language (str): Programming language
+            file_path (Optional[str]): Path the code came from, recorded for invalidate()
             
         Returns:
-            Dict[str, List[str]]: Dictionary with symbol types and their names
+            Dict[str, Tuple[str, ...]]: Dictionary with symbol types and their names
         """
-        if not TREE_SITTER_AVAILABLE or language not in self.parsers:
-            return self._fallback_extraction(code, language)
-        
-        try:
-            parser = self.parsers[language]
-            tree = parser.parse(bytes(code, "utf8"))
-            
-            # Use language-specific extraction
-            if language == 'python':
-                return self._extract_python_symbols(tree.root_node)
-            elif language in ['javascript', 'typescript']:
-                return self._extract_js_ts_symbols(tree.root_node)
-            elif language == 'java':
-                return self._extract_java_symbols(tree.root_node)
-            elif language in ['cpp', 'c']:
-                return self._extract_c_cpp_symbols(tree.root_node)
-            elif language == 'go':
-                return self._extract_go_symbols(tree.root_node)
-            elif language == 'rust':
-                return self._extract_rust_symbols(tree.root_node)
-            elif language == 'ruby':
-                return self._extract_ruby_symbols(tree.root_node)
-            elif language == 'php':
-                return self._extract_php_symbols(tree.root_node)
-            elif language == 'csharp':
-                return self._extract_csharp_symbols(tree.root_node)
-            elif language == 'swift':
-                return self._extract_swift_symbols(tree.root_node)
-            elif language == 'kotlin':
-                return self._extract_kotlin_symbols(tree.root_node)
-            else:
-                return self._extract_generic_symbols(tree.root_node)
-                
-        except Exception as e:
-            print(f"⚠️  Tree-sitter extraction failed for {language}: {e}")
-            return self._fallback_extraction(code, language)
-    
-    def _extract_python_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract Python symbols."""
-        symbols = {
-            'imports': [],
-            'functions': [],
-            'classes': [],
-            'variables': [],
-            'decorators': []
-        }
+        cache = get_symbol_cache()
+        key = symbols_key(code, language)
         
-        def traverse(node: Node):
-            if node.type == 'import_statement':
-                symbols['imports'].append(node.text.decode('utf8').strip())
-            elif node.type == 'import_from_statement':
-                symbols['imports'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_definition':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_definition':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'decorator':
-                symbols['decorators'].append(node.text.decode('utf8').strip())
-            elif node.type == 'assignment':
-                # Extract variable assignments at module level
-                if node.parent and node.parent.type == 'module':
-                    left = node.child_by_field_name('left')
-                    if left and left.type == 'identifier':
-                        symbols['variables'].append(left.text.decode('utf8'))
-            
-            for child in node.children:
-                traverse(child)
-        
-        traverse(root_node)
+        symbols = cache.get(key)
+        if symbols is None:
+            symbols = self._extract_symbols_uncached(code, language)
+            cache.put(key, symbols, file_path)
         return symbols
     
-    def _extract_js_ts_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract JavaScript/TypeScript symbols."""
-        symbols = {
-            'imports': [],
-            'functions': [],
-            'classes': [],
-            'variables': [],
-            'exports': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'import_statement':
-                symbols['imports'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'variable_declaration':
-                for child in node.children:
-                    if child.type == 'variable_declarator':
-                        name_node = child.child_by_field_name('name')
-                        if name_node:
-                            symbols['variables'].append(name_node.text.decode('utf8'))
-            elif node.type == 'export_statement':
-                symbols['exports'].append(node.text.decode('utf8').strip())
-            
-            for child in node.children:
-                traverse(child)
+    def extract_buffer_symbols(self, data: 'mmap.mmap', language: str,
+                               file_path: Optional[str] = None) -> Dict[str, Tuple[str, ...]]:
+        """
+        Extract symbols from UTF-8 source held in a buffer such as an mmap.
         
-        traverse(root_node)
-        return symbols
-    
-    def _extract_java_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract Java symbols."""
-        symbols = {
-            'imports': [],
-            'functions': [],
-            'classes': [],
-            'interfaces': [],
-            'packages': []
-        }
+        The parser pulls the source through a read callback, so it is never copied
+        into one Python bytes object; only captured symbol text is sliced out.
         
-        def traverse(node: Node):
-            if node.type == 'import_declaration':
-                symbols['imports'].append(node.text.decode('utf8').strip())
-            elif node.type == 'package_declaration':
-                symbols['packages'].append(node.text.decode('utf8').strip())
-            elif node.type == 'method_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'interface_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['interfaces'].append(name_node.text.decode('utf8'))
+        Args:
+            data (mmap.mmap): UTF-8 encoded source code
+            language (str): Programming language
+            file_path (Optional[str]): Path the code came from, recorded for invalidate()
             
-            for child in node.children:
-                traverse(child)
+        Returns:
+            Dict[str, Tuple[str, ...]]: Dictionary with symbol types and their names
+        """
+        cache = get_symbol_cache()
+        key = symbols_key(data, language)
         
-        traverse(root_node)
+        symbols = cache.get(key)
+        if symbols is None:
+            symbols = self._extract_buffer_uncached(data, language)
+            cache.put(key, symbols, file_path)
         return symbols
     
-    def _extract_c_cpp_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract C/C++ symbols."""
-        symbols = {
-            'includes': [],
-            'functions': [],
-            'classes': [],
-            'structs': [],
-            'defines': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'preproc_include':
-                symbols['includes'].append(node.text.decode('utf8').strip())
-            elif node.type == 'preproc_def':
-                symbols['defines'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_definition':
-                declarator = node.child_by_field_name('declarator')
-                if declarator:
-                    name_node = self._find_function_name(declarator)
-                    if name_node:
-                        symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_specifier':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'struct_specifier':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['structs'].append(name_node.text.decode('utf8'))
-            
-            for child in node.children:
-                traverse(child)
-        
-        traverse(root_node)
-        return symbols
+    def invalidate(self, file_path: str) -> None:
+        """Forget cached symbols recorded for a file (hook for file watchers)."""
+        get_symbol_cache().invalidate(file_path)
     
-    def _extract_go_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract Go symbols."""
-        symbols = {
-            'imports': [],
-            'functions': [],
-            'types': [],
-            'variables': [],
-            'constants': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'import_spec':
-                symbols['imports'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'type_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['types'].append(name_node.text.decode('utf8'))
-            elif node.type == 'var_declaration':
-                symbols['variables'].append(node.text.decode('utf8').strip())
-            elif node.type == 'const_declaration':
-                symbols['constants'].append(node.text.decode('utf8').strip())
-            
-            for child in node.children:
-                traverse(child)
+    def _extract_symbols_uncached(self, code: str, language: str) -> Dict[str, Tuple[str, ...]]:
+        """Parse code and extract its symbols."""
+        if not self._ensure_language(language):
+            return self._fallback_extraction(code, language)
         
-        traverse(root_node)
-        return symbols
+        try:
+            parser = self._get_parser(language)
+            # Encode once; captured text is sliced from these bytes rather than copied per node
+            src = code.encode('utf-8')
+            tree = parser.parse(src)
+            return self._extract_query_symbols(language, tree.root_node, src)
+                
+        except Exception as e:
+            print(f"⚠️  Tree-sitter extraction failed for {language}: {e}")
+            return self._fallback_extraction(code, language)
     
-    def _extract_rust_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract Rust symbols."""
-        symbols = {
-            'uses': [],
-            'functions': [],
-            'structs': [],
-            'enums': [],
-            'traits': [],
-            'impls': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'use_declaration':
-                symbols['uses'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_item':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'struct_item':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['structs'].append(name_node.text.decode('utf8'))
-            elif node.type == 'enum_item':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['enums'].append(name_node.text.decode('utf8'))
-            elif node.type == 'trait_item':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['traits'].append(name_node.text.decode('utf8'))
-            elif node.type == 'impl_item':
-                symbols['impls'].append('impl block')
-            
-            for child in node.children:
-                traverse(child)
+    def _extract_buffer_uncached(self, data: 'mmap.mmap', language: str) -> Dict[str, Tuple[str, ...]]:
+        """Parse buffered code through a read callback and extract its symbols."""
+        if self._ensure_language(language):
+            try:
+                parser = self._get_parser(language)
+                # Large reads: tree-sitter calls back once per returned slice, so tiny slices dominate the parse
+                tree = parser.parse(lambda byte_offset, point: data[byte_offset:byte_offset + PARSE_READ_SIZE],
+                                    encoding='utf8')
+                return self._extract_query_symbols(language, tree.root_node, data)
+            except Exception as e:
+                print(f"⚠️  Tree-sitter extraction failed for {language}: {e}")
         
-        traverse(root_node)
-        return symbols
+        # The regex fallback needs the whole text as a str
+        return self._fallback_extraction(data[:].decode('utf-8', errors='replace'), language)
     
-    def _extract_ruby_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract Ruby symbols."""
-        symbols = {
-            'requires': [],
-            'functions': [],
-            'classes': [],
-            'modules': [],
-            'constants': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'call' and node.children:
-                method_node = node.children[0]
-                if method_node.text.decode('utf8') == 'require':
-                    symbols['requires'].append(node.text.decode('utf8').strip())
-            elif node.type == 'method':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'module':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['modules'].append(name_node.text.decode('utf8'))
-            
-            for child in node.children:
-                traverse(child)
+    def _get_parser(self, language: str) -> 'Parser':
+        """Return the calling thread's parser for a language, creating it on first use."""
+        parsers = getattr(self._local, 'parsers', None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
         
-        traverse(root_node)
-        return symbols
+        parser = parsers.get(language)
+        if parser is None:
+            parser = parsers[language] = Parser(self.languages[language])
+        return parser
     
-    def _extract_php_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract PHP symbols."""
-        symbols = {
-            'includes': [],
-            'functions': [],
-            'classes': [],
-            'interfaces': [],
-            'traits': [],
-            'namespaces': []
-        }
+    def _extract_query_symbols(self, language: str, root_node: Node, src: 'bytes | mmap.mmap') -> Dict[str, Tuple[str, ...]]:
+        """Collect symbols with the language's precompiled query, so tree-sitter does the walk."""
+        symbols = {bucket: [] for bucket in SYMBOL_QUERIES.get(language, GENERIC_SYMBOL_QUERY)}
         
-        def traverse(node: Node):
-            if node.type == 'include_expression' or node.type == 'require_expression':
-                symbols['includes'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_definition':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'interface_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['interfaces'].append(name_node.text.decode('utf8'))
-            elif node.type == 'trait_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['traits'].append(name_node.text.decode('utf8'))
-            elif node.type == 'namespace_definition':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['namespaces'].append(name_node.text.decode('utf8'))
+        for bucket, nodes in self._bucket_captures(language, root_node):
+            if bucket in CAPTURE_LITERALS:
+                symbols[bucket].extend([CAPTURE_LITERALS[bucket]] * len(nodes))
+                continue
             
-            for child in node.children:
-                traverse(child)
-        
-        traverse(root_node)
-        return symbols
-    
-    def _extract_csharp_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract C# symbols."""
-        symbols = {
-            'usings': [],
-            'functions': [],
-            'classes': [],
-            'interfaces': [],
-            'namespaces': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'using_directive':
-                symbols['usings'].append(node.text.decode('utf8').strip())
-            elif node.type == 'method_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'interface_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['interfaces'].append(name_node.text.decode('utf8'))
-            elif node.type == 'namespace_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['namespaces'].append(name_node.text.decode('utf8'))
+            # A list (unlike a generator) has a known length, so the bucket is resized once per capture
+            symbols[bucket].extend([self._intern_text(src[node.start_byte:node.end_byte]) for node in nodes])
+        
+        # Tuples are exact-size and immutable, so the symbol cache can hand out the same buckets to every caller
+        return {bucket: tuple(names) for bucket, names in symbols.items()}
+    
+    def _bucket_captures(self, language: str, root_node: Node):
+        """Yield (bucket, symbol nodes) for each capture name of the language's query."""
+        capture_buckets = self.capture_buckets[language]
+        
+        # Captures come back grouped by name
+        for capture_name, nodes in QueryCursor(self.queries[language]).captures(root_node).items():
+            entry = capture_buckets.get(capture_name)
+            if entry is None:
+                continue  # Helper captures used only by predicates
+            bucket, kind = entry
             
-            for child in node.children:
-                traverse(child)
-        
-        traverse(root_node)
-        return symbols
-    
-    def _extract_swift_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract Swift symbols."""
-        symbols = {
-            'imports': [],
-            'functions': [],
-            'classes': [],
-            'structs': [],
-            'protocols': [],
-            'extensions': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'import_declaration':
-                symbols['imports'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'struct_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['structs'].append(name_node.text.decode('utf8'))
-            elif node.type == 'protocol_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['protocols'].append(name_node.text.decode('utf8'))
-            elif node.type == 'extension_declaration':
-                symbols['extensions'].append('extension')
+            # Pre-order document position, the order a recursive walk would visit them in
+            nodes = sorted(nodes, key=lambda node: (node.start_byte, -node.end_byte))
             
-            for child in node.children:
-                traverse(child)
-        
-        traverse(root_node)
-        return symbols
-    
-    def _extract_kotlin_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Extract Kotlin symbols."""
-        symbols = {
-            'imports': [],
-            'functions': [],
-            'classes': [],
-            'interfaces': [],
-            'objects': [],
-            'packages': []
-        }
-        
-        def traverse(node: Node):
-            if node.type == 'import_header':
-                symbols['imports'].append(node.text.decode('utf8').strip())
-            elif node.type == 'package_header':
-                symbols['packages'].append(node.text.decode('utf8').strip())
-            elif node.type == 'function_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['functions'].append(name_node.text.decode('utf8'))
-            elif node.type == 'class_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['classes'].append(name_node.text.decode('utf8'))
-            elif node.type == 'interface_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['interfaces'].append(name_node.text.decode('utf8'))
-            elif node.type == 'object_declaration':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    symbols['objects'].append(name_node.text.decode('utf8'))
+            if kind == 'declarator':
+                nodes = [name_node for name_node in map(self._find_function_name, nodes) if name_node]
             
-            for child in node.children:
-                traverse(child)
-        
-        traverse(root_node)
-        return symbols
+            yield bucket, nodes
     
-    def _extract_generic_symbols(self, root_node: Node) -> Dict[str, List[str]]:
-        """Generic symbol extraction for unsupported languages."""
-        symbols = {
-            'identifiers': [],
-            'strings': [],
-            'comments': []
-        }
+    def extract_symbols_lazy(self, code: str, language: str) -> Dict[str, SymbolSpans]:
+        """
+        Extract symbols as byte spans, for callers that mostly need counts or offsets.
         
-        def traverse(node: Node):
-            if node.type == 'identifier':
-                symbols['identifiers'].append(node.text.decode('utf8'))
-            elif node.type == 'string':
-                symbols['strings'].append(node.text.decode('utf8'))
-            elif 'comment' in node.type:
-                symbols['comments'].append(node.text.decode('utf8').strip())
-            
-            for child in node.children:
-                traverse(child)
+        Unlike extract_symbols, nothing is decoded or cached; indexing a SymbolSpans
+        decodes that one symbol from the encoded source.
         
-        traverse(root_node)
-        return symbols
-    
-    def _fallback_extraction(self, code: str, language: str) -> Dict[str, List[str]]:
+        Args:
+            code (str): Source code
+            language (str): Programming language
+            
+        Returns:
+            Dict[str, SymbolSpans]: Symbol type -> spans of its symbols
+        """
+        if self._ensure_language(language):
+            try:
+                src = code.encode('utf-8')
+                root_node = self._get_parser(language).parse(src).root_node
+                
+                offsets = {bucket: ([], []) for bucket in SYMBOL_QUERIES.get(language, GENERIC_SYMBOL_QUERY)}
+                for bucket, nodes in self._bucket_captures(language, root_node):
+                    starts, ends = offsets[bucket]
+                    starts.extend([node.start_byte for node in nodes])
+                    ends.extend([node.end_byte for node in nodes])
+                
+                # Two int32 arrays per bucket instead of one str object per symbol
+                return {
+                    bucket: SymbolSpans(src, np.array(starts, dtype=np.int32), np.array(ends, dtype=np.int32),
+                                        CAPTURE_LITERALS.get(bucket))
+                    for bucket, (starts, ends) in offsets.items()
+                }
+            except Exception as e:
+                print(f"⚠️  Tree-sitter extraction failed for {language}: {e}")
+        
+        return {symbol_type: SymbolSpans.from_strings(names)
+                for symbol_type, names in self._fallback_extraction(code, language).items()}
+    
+    def _intern_text(self, raw: bytes) -> str:
+        """Decode captured bytes to a stripped, interned string, reusing earlier decodes."""
+        text = self._intern.get(raw)
+        if text is None:
+            if len(self._intern) >= INTERN_TABLE_SIZE:
+                self._intern.clear()  # Bound memory; interned strings stay alive while referenced
+            # str.strip() returns identifiers unchanged without copying, so it only costs on statements
+            text = self._intern[raw] = sys.intern(raw.decode('utf-8').strip())
+        return text
+    
+    def _fallback_extraction(self, code: str, language: str) -> Dict[str, Tuple[str, ...]]:
         """Fallback regex-based extraction when tree-sitter is not available."""
-        import re
-        
-        patterns = {
-            'python': {
-                'imports': [
-                    r'^import\s+[\w\.]+(?:\s+as\s+\w+)?',
-                    r'^from\s+[\w\.]+\s+import\s+.+'
-                ],
-                'functions': [r'^def\s+(\w+)\s*\('],
-                'classes': [r'^class\s+(\w+)(?:\s*\(.*?\))?:']
-            },
-            'javascript': {
-                'imports': [
-                    r'import\s+.*?from\s+[\'"][^\'"]+[\'"]',
-                    r'const\s+.*?=\s+require\([\'"][^\'"]+[\'"]\)'
-                ],
-                'functions': [
-                    r'function\s+(\w+)\s*\(',
-                    r'(\w+)\s*=\s*(?:async\s+)?(?:function|\([^)]*\)\s*=>)'
-                ],
-                'classes': [r'class\s+(\w+)(?:\s+extends\s+\w+)?\s*\{']
-            }
-        }
-        
         symbols = {'imports': [], 'functions': [], 'classes': []}
         
-        if language in patterns:
-            for symbol_type, pattern_list in patterns[language].items():
-                for pattern in pattern_list:
-                    matches = re.findall(pattern, code, re.MULTILINE)
-                    symbols[symbol_type].extend(matches)
-        
-        return symbols
+        if language in FALLBACK_REGEXES:
+            scans, symbol_types = FALLBACK_REGEXES[language]
+            # Matches are kept per pattern, so each bucket lists a pattern's matches before
+            # the next pattern's whether or not the patterns share a scan
+            matches = [[] for _ in symbol_types]
+            match_count = 0
+            for regex, alternatives in scans:
+                for match in regex.finditer(code):
+                    if match_count >= MAX_FALLBACK_MATCHES:
+                        break  # Pathological input; stop instead of collecting without bound
+                    pattern_index, group = alternatives[match.lastindex]
+                    matches[pattern_index].append(match.group(group))
+                    match_count += 1
+            for symbol_type, names in zip(symbol_types, matches):
+                symbols[symbol_type].extend(names)
+        
+        return {symbol_type: tuple(names) for symbol_type, names in symbols.items()}
     
     def _find_function_name(self, node: Node) -> Optional[Node]:
         """Helper to find function name in C/C++ declarators."""
-        if node.type == 'identifier':
-            return node
-        
-        for child in node.children:
-            result = self._find_function_name(child)
-            if result:
-                return result
-        
-        return None
+        # Pre-order walk with a TreeCursor, which moves in C without building node.children lists;
+        # a cursor created on a node cannot climb above it, so the walk stays within the declarator
+        cursor = node.walk()
+        while True:
+            if cursor.node.type == 'identifier':
+                return cursor.node
+            if cursor.goto_first_child():
+                continue
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return None
     
     def get_available_languages(self) -> List[str]:
-        """Get list of available languages."""
-        return list(self.parsers.keys())
+        """Get list of available languages (installed grammar modules, without loading them)."""
+        return [lang_name for lang_name, module_name in LANGUAGE_MODULES.items()
+                if lang_name not in self._unavailable and importlib.util.find_spec(module_name)]
     
     def is_language_supported(self, language: str) -> bool:
         """Check if a language is supported."""
-        return language in self.parsers
+        return self._ensure_language(language)
 
 
 # Global instance
 symbol_extractor = SymbolExtractor()
 
 
-def extract_file_symbols(file_path: str, content: str) -> Dict[str, List[str]]:
+def extract_file_symbols(file_path: str, content: str) -> Dict[str, Tuple[str, ...]]:
     """
     Convenience function to extract symbols from a file.
     
@@ -641,22 +606,109 @@ def extract_file_symbols(file_path: str, content: str) -> Dict[str, List[str]]:
         content (str): File content
         
     Returns:
-        Dict[str, List[str]]: Extracted symbols
+        Dict[str, Tuple[str, ...]]: Extracted symbols
+    """
+    language = symbol_extractor.get_language_from_extension(file_path)
+    
+    if not language:
+        return {'error': ('Unsupported file type',)}
+    
+    return symbol_extractor.extract_symbols(content, language, file_path)
+
+
+def extract_file_symbols_path(file_path: str) -> Dict[str, Tuple[str, ...]]:
+    """
+    Extract symbols from a file on disk by memory-mapping it, for very large sources.
+    
+    Args:
+        file_path (str): Path to the file (also used for language detection)
+        
+    Returns:
+        Dict[str, Tuple[str, ...]]: Extracted symbols
     """
     language = symbol_extractor.get_language_from_extension(file_path)
     
     if not language:
-        return {'error': ['Unsupported file type']}
+        return {'error': ('Unsupported file type',)}
+    
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            return symbol_extractor.extract_symbols('', language, file_path)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return symbol_extractor.extract_buffer_symbols(mapped, language, file_path)
+
+
+# Upper bound on worker processes per pool; several repositories may be ingested at once,
+# each with its own pool
+MAX_POOL_WORKERS = 4
+
+
+def pool_worker_count() -> int:
+    """Number of worker processes to give one process pool."""
+    return max(1, min(os.cpu_count() or 1, MAX_POOL_WORKERS))
+
+
+def pool_mp_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for worker process pools.
+    
+    Callers run threads (prefetchers, asyncio.to_thread ingests, database and HTTP pools)
+    by the time a pool starts, and fork() would copy their held locks into the children.
+    Workers are started from a clean forkserver instead, or spawned where it is unavailable.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def _init_extract_worker() -> None:
+    """Set up a pool worker for batch extraction."""
+    # Extraction builds only acyclic lists and strings, so cyclic GC passes are pure overhead;
+    # the worker exits with the pool, which releases everything at once
+    gc.freeze()
+    gc.disable()
+
+
+def _worker_extract(item: Tuple[str, str]) -> Dict[str, Tuple[str, ...]]:
+    """Extract one file's symbols; runs in a pool worker."""
+    # Each worker process builds the module-level extractor (and its grammars) once on import
+    file_path, content = item
+    return extract_file_symbols(file_path, content)
+
+
+def extract_files_symbols(items: List[Tuple[str, str]]) -> List[Dict[str, Tuple[str, ...]]]:
+    """
+    Extract symbols from many files in parallel.
     
-    return symbol_extractor.extract_symbols(content, language)
+    Args:
+        items (List[Tuple[str, str]]): (file_path, content) pairs
+        
+    Returns:
+        List[Dict[str, Tuple[str, ...]]]: Extracted symbols, in input order
+    """
+    if not items:
+        return []
+    
+    workers = pool_worker_count()
+    # Tree-sitter parsing is CPU-bound Python glue, so it needs processes; the
+    # regex fallback spends its time inside re, which threads handle fine
+    if TREE_SITTER_AVAILABLE:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=pool_mp_context(),
+                                       initializer=_init_extract_worker)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    
+    with executor:
+        # Large batches per task amortize the cost of shipping file contents to workers
+        return list(executor.map(_worker_extract, items, chunksize=max(1, len(items) // (workers * 8))))
 
 
-def create_symbol_summary(symbols: Dict[str, List[str]], max_items: int = 10) -> str:
+def create_symbol_summary(symbols: Dict[str, Tuple[str, ...]], max_items: int = 10) -> str:
     """
     Create a human-readable summary of extracted symbols.
     
     Args:
-        symbols (Dict[str, List[str]]): Extracted symbols
+        symbols (Dict[str, Tuple[str, ...]]): Extracted symbols
         max_items (int): Maximum items per category
         
     Returns:
@@ -666,7 +718,7 @@ def create_symbol_summary(symbols: Dict[str, List[str]], max_items: int = 10) ->
     
     for symbol_type, items in symbols.items():
         if items and symbol_type != 'error':
-            display_items = items[:max_items]
+            display_items = list(items[:max_items])
             if len(items) > max_items:
                 display_items.append(f"... and {len(items) - max_items} more")
             
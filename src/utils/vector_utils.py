@@ -4,57 +4,418 @@ Handles storage and retrieval of structured chunks with symbol information.
 """
 
 import os
+import re
 import json
-from typing import Dict, List, Optional, Any
+import hashlib
+import asyncio
+import itertools
+import functools
+import threading
+from collections import OrderedDict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Iterable, Iterator, TYPE_CHECKING
+import numpy as np
+import orjson
 from dotenv import load_dotenv
 import vecs
+from sqlalchemy import MetaData, Table, Column, Text, select, delete, cast, text, and_, or_, null, func, create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql
+from vecs.collection import build_filters
+from pgvector.sqlalchemy import HALFVEC
 from langchain_openai import OpenAIEmbeddings
+from .embedding_cache import CachedEmbeddings
+from .query_cache import SemanticQueryCache
+
+if TYPE_CHECKING:
+    from .git_utils import FileChunk
 
 # Load environment variables
 load_dotenv()
 
+# OpenAI accepts up to ~2048 inputs per embeddings request; stay well below that
+EMBEDDING_BATCH_SIZE = 256
+
+# Maximum number of embedding requests in flight at once
+EMBEDDING_CONCURRENCY = 10
+
+# Retries (with exponential backoff) for rate-limited embedding requests; concurrent
+# batches hit OpenAI rate limits far more often than sequential ones
+EMBEDDING_MAX_RETRIES = 6
+
+# Text embedded once to stand in for every blank chunk
+EMPTY_CHUNK_TEXT = "empty file"
+
+# Worker threads that run searches for async callers, off the event loop
+SEARCH_WORKERS = 4
+
+# Number of chunks embedded and upserted together when storing a repository
+UPSERT_BATCH_SIZE = 1000
+
+# Local model used instead of OpenAI when LOCAL_EMBEDDINGS=1
+LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# First pgvector release with the halfvec (fp16) type
+HALFVEC_MIN_VERSION = (0, 7, 0)
+
+# Database connections kept open by each shared vecs client
+DB_POOL_SIZE = 8
+
+# Seconds a get_structured_collections() result is reused before listing again
+COLLECTIONS_CACHE_TTL = 60
+
+# Seconds a list_chunk_ids() result is reused; chunk IDs only change when a collection is written
+CHUNK_IDS_CACHE_TTL = 60
+
+# Chunk IDs read per page by iter_chunk_ids
+CHUNK_ID_PAGE_SIZE = 512
+
+# Chunks fetched by ID that are kept in memory for repeat lookups
+CHUNK_PAYLOAD_CACHE_SIZE = 10000
+
+# Seconds a chunk fetched by ID is reused; writes from other processes are only seen after it
+CHUNK_PAYLOAD_CACHE_TTL = 60
+
+# Per-collection statistics for get_repository_overview. Nested metadata values are
+# JSON objects, or JSON strings in collections stored by older versions.
+REPOSITORY_OVERVIEW_SQL = r"""
+with chunks as (
+    select split_part(id, '#', 1) as file,
+           metadata->>'chunk_id' is not null as chunked,
+           case when jsonb_typeof(metadata->'metadata') = 'string'
+                then (metadata->>'metadata')::jsonb else metadata->'metadata' end as file_metadata,
+           case when jsonb_typeof(metadata->'symbols') = 'string'
+                then (metadata->>'symbols')::jsonb else metadata->'symbols' end as symbols,
+           case when jsonb_typeof(metadata->'imports') = 'string'
+                then (metadata->>'imports')::jsonb else metadata->'imports' end as imports
+    from {table}
+), stats as (
+    select file, chunked,
+           coalesce(file_metadata->>'language', 'unknown') as language,
+           coalesce('.' || substring(file from '\.([^./]+)$'), 'unknown') as file_type,
+           (select coalesce(sum(jsonb_array_length(value)), 0)
+            from jsonb_each(case when jsonb_typeof(symbols) = 'object' then symbols else '{{}}' end)
+            where jsonb_typeof(value) = 'array') as symbol_count,
+           case when jsonb_typeof(imports) = 'array' then jsonb_array_length(imports) else 0 end as import_count
+    from chunks
+)
+select count(*),
+       count(distinct file),
+       count(distinct file) filter (where chunked),
+       coalesce(sum(symbol_count), 0)::bigint,
+       coalesce(sum(import_count), 0)::bigint,
+       (select jsonb_object_agg(language, n) from (select language, count(*) as n from stats group by language) l),
+       (select jsonb_object_agg(file_type, n) from (select file_type, count(*) as n from stats group by file_type) t)
+from stats
+"""
+
+# Chunk contents live in a side table instead of every vector's metadata, keeping the
+# vector rows small. It sits in the vecs schema (not exposed through the Supabase API)
+# and its leading underscore keeps vecs from listing it as a collection.
+repo_files_table = Table(
+    "_repo_files",
+    MetaData(schema="vecs"),
+    Column("repo", Text, primary_key=True),
+    Column("path", Text, primary_key=True),
+    Column("content", Text, nullable=False),
+)
+
+
+# Shared vecs clients, one per database URL
+_vecs_clients: Dict[str, vecs.Client] = {}
+_vecs_clients_lock = threading.Lock()
+
+
+def _orjson_dumps(value: Any) -> str:
+    """JSON-encode a value for a JSONB bind parameter (SQLAlchemy expects str)."""
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+
+def get_vecs_client(supabase_url: str) -> vecs.Client:
+    """
+    Return the shared vecs client for the given database URL.
+    
+    The client wraps a SQLAlchemy connection pool, which is safe to share across
+    threads; every call opens its own short-lived session from it.
+    """
+    with _vecs_clients_lock:
+        if supabase_url not in _vecs_clients:
+            vx = vecs.create_client(supabase_url)
+            # vecs builds its engine with default pool settings; a long-lived client shared by
+            # threads needs more connections and must replace ones the server closed while idle
+            vx.engine.dispose()
+            # orjson encodes and decodes the per-chunk JSONB metadata several times faster than json
+            vx.engine = create_engine(
+                supabase_url, pool_size=DB_POOL_SIZE, pool_pre_ping=True,
+                json_serializer=_orjson_dumps, json_deserializer=orjson.loads
+            )
+            vx.Session = sessionmaker(vx.engine)
+            repo_files_table.create(vx.engine, checkfirst=True)
+            _vecs_clients[supabase_url] = vx
+        return _vecs_clients[supabase_url]
+
+
+def release_vecs_client(supabase_url: str) -> None:
+    """Disconnect the shared client for a database URL; the next caller creates a new one."""
+    with _vecs_clients_lock:
+        vx = _vecs_clients.pop(supabase_url, None)
+    if vx is not None:
+        vx.disconnect()
+
+
+# (timestamp, names) of the last collection listing
+_collections_cache: Optional[Tuple[float, List[str]]] = None
+
+
+def _invalidate_collections_cache() -> None:
+    """Forget the cached collection listing after collections are created or deleted."""
+    global _collections_cache
+    _collections_cache = None
+
+
+def _stored_json(value: Any, default: Any) -> Any:
+    """Read a nested metadata value, which older collections stored as a JSON string."""
+    if value is None:
+        return default
+    return orjson.loads(value) if isinstance(value, str) else value
+
+
+@functools.lru_cache(maxsize=None)
+def _get_openai_embeddings(model: str) -> OpenAIEmbeddings:
+    """Return a shared OpenAI embeddings client so its HTTP connections are reused."""
+    return OpenAIEmbeddings(model=model, max_retries=EMBEDDING_MAX_RETRIES)
+
+
+class LocalEmbeddings:
+    """Sentence-transformers model exposed through the LangChain embeddings interface."""
+    
+    def __init__(self, model_name: str = LOCAL_EMBEDDING_MODEL):
+        # Imported lazily so the OpenAI path does not pay for loading torch
+        from sentence_transformers import SentenceTransformer
+        
+        # Picks CUDA automatically when it is available
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+    
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed documents locally."""
+        # Unit-length vectors, matching the OpenAI embeddings the cosine index is built for
+        return self.model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+    
+    async def aembed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed documents in a worker thread so the event loop stays free."""
+        return await asyncio.to_thread(self.embed_documents, texts)
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single query locally."""
+        return self.embed_documents([text])[0]
+    
+    async def aembed_query(self, text: str) -> np.ndarray:
+        """Async variant of embed_query."""
+        return await asyncio.to_thread(self.embed_query, text)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_local_embeddings(model_name: str) -> LocalEmbeddings:
+    """Return a shared local model so it is only loaded once per process."""
+    return LocalEmbeddings(model_name)
+
 
 class StructuredVectorStore:
     """Vector store optimized for structured repository chunks."""
     
-    def __init__(self, supabase_url: Optional[str] = None, embedding_model: str = "text-embedding-3-small"):
+    # Shared by every store, so concurrent async searches are bounded process-wide
+    _executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="vector-search")
+    
+    def __init__(self, supabase_url: Optional[str] = None, embedding_model: Optional[str] = None):
         self.supabase_url = supabase_url or os.getenv("SUPABASE_DB_URL")
         if not self.supabase_url:
             raise ValueError("SUPABASE_DB_URL environment variable not set")
         
-        self.embeddings = OpenAIEmbeddings(model=embedding_model)
-        self.dimension = 1536  # OpenAI text-embedding-3-small dimension
+        if os.getenv("LOCAL_EMBEDDINGS") == "1":
+            # 384-D local model: no API round-trips and 4x smaller vectors
+            embedding_model = embedding_model or LOCAL_EMBEDDING_MODEL
+            base_embeddings = _get_local_embeddings(embedding_model)
+            self.dimension = base_embeddings.dimension
+        else:
+            embedding_model = embedding_model or "text-embedding-3-small"
+            base_embeddings = _get_openai_embeddings(embedding_model)
+            self.dimension = 1536  # OpenAI text-embedding-3-small dimension
         
-    def create_collection(self, collection_name: str, drop_if_exists: bool = False) -> Any:
-        """Create or get a vector collection."""
-        vx = vecs.create_client(self.supabase_url)
+        # Cache embeddings by content hash so unchanged texts skip the API
+        self.embeddings = CachedEmbeddings(base_embeddings, embedding_model)
+        self._halfvec_supported: Optional[bool] = None
+        self._empty_chunk_embedding: Optional[np.ndarray] = None
         
-        try:
-            if drop_if_exists:
-                try:
-                    vx.delete_collection(collection_name)
-                    print(f"🗑️  Deleted existing collection: {collection_name}")
-                except Exception:
-                    pass  # Collection might not exist
-            
-            collection = vx.get_or_create_collection(
-                name=collection_name,
-                dimension=self.dimension
-            )
+        # Results of recent searches, reused for near-identical queries
+        self._query_cache = SemanticQueryCache()
+        # collection name -> (time listed, sorted chunk IDs)
+        self._chunk_ids_cache: Dict[str, Tuple[float, List[str]]] = {}
+        # (collection name, chunk ID) -> (time fetched, collection version, has content, chunk),
+        # oldest first; entries from before the collection's last write here, or older than
+        # CHUNK_PAYLOAD_CACHE_TTL, are stale
+        self._payload_cache: "OrderedDict[Tuple[str, str], Tuple[float, int, bool, Dict[str, Any]]]" = OrderedDict()
+        self._payload_lock = threading.Lock()
+    
+    def close(self) -> None:
+        """Disconnect the database client this store uses."""
+        # Methods fetch the shared client on every call, so other stores simply reconnect
+        release_vecs_client(self.supabase_url)
+    
+    def __enter__(self) -> 'StructuredVectorStore':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        
+    async def _aembed_batch(self, semaphore: asyncio.Semaphore, texts: List[str]) -> List[Any]:
+        """Embed one batch of texts while holding a concurrency slot."""
+        async with semaphore:
+            try:
+                return await self.embeddings.aembed_documents(texts)
+            except Exception as e:
+                print(f"⚠️  Embedding batch of {len(texts)} failed ({e}); retrying texts one by one")
             
-            print(f"✅ Collection ready: {collection_name}")
-            return collection
+            embeddings = []
+            for text in texts:
+                try:
+                    embeddings.extend(await self.embeddings.aembed_documents([text]))
+                except Exception as e:
+                    print(f"⚠️  Error embedding text: {e}")
+                    embeddings.append(self._failed_embedding())
+            return embeddings
+    
+    def _embed_batch(self, texts: List[str]) -> List[Any]:
+        """Synchronous variant of _aembed_batch."""
+        try:
+            return self.embeddings.embed_documents(texts)
+        except Exception as e:
+            print(f"⚠️  Embedding batch of {len(texts)} failed ({e}); retrying texts one by one")
+        
+        embeddings = []
+        for text in texts:
+            try:
+                embeddings.extend(self.embeddings.embed_documents([text]))
+            except Exception as e:
+                print(f"⚠️  Error embedding text: {e}")
+                embeddings.append(self._failed_embedding())
+        return embeddings
+    
+    def _get_empty_chunk_embedding(self) -> np.ndarray:
+        """Embedding shared by blank chunks, computed once (and served from the embedding cache after)."""
+        if self._empty_chunk_embedding is None:
+            embedding = self._to_array(self._embed_batch([EMPTY_CHUNK_TEXT]))[0]
+            if np.isnan(embedding).any():
+                return embedding  # Retried on the next batch
+            self._empty_chunk_embedding = embedding
+        return self._empty_chunk_embedding
+    
+    def _failed_embedding(self) -> np.ndarray:
+        """Placeholder row for a text that could not be embedded; callers skip NaN rows."""
+        return np.full(self.dimension, np.nan, dtype=np.float32)
+    
+    def _length_sorted_batches(self, texts: List[str]) -> Tuple[np.ndarray, List[List[str]]]:
+        """
+        Split texts into batches of similar length to cut per-batch padding.
+        
+        Returns:
+            Tuple[np.ndarray, List[List[str]]]: Permutation applied to the texts and the batches
+        """
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        sorted_texts = [texts[i] for i in order]
+        batches = [sorted_texts[start:start + EMBEDDING_BATCH_SIZE]
+                   for start in range(0, len(sorted_texts), EMBEDDING_BATCH_SIZE)]
+        return order, batches
+    
+    def _unpermute(self, order: np.ndarray, embeddings: List[Any]) -> np.ndarray:
+        """Put embeddings computed in sorted order back into input order."""
+        sorted_embeddings = self._to_array(embeddings)
+        result = np.empty_like(sorted_embeddings)
+        result[order] = sorted_embeddings
+        return result
+    
+    async def aembed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts concurrently in length-sorted batches of EMBEDDING_BATCH_SIZE.
+        
+        Args:
+            texts (List[str]): Texts to embed
             
-        finally:
-            vx.disconnect()
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension), in input order;
+                rows of texts that could not be embedded are NaN
+        """
+        semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+        order, batches = self._length_sorted_batches(texts)
+        results = await asyncio.gather(*(self._aembed_batch(semaphore, batch) for batch in batches))
+        return self._unpermute(order, [embedding for batch in results for embedding in batch])
     
-    def store_structured_repo(self, repo_data: Dict[str, Any], refresh: bool = False) -> str:
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Synchronous wrapper around aembed_documents."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aembed_documents(texts))
+        
+        # Already inside an event loop (e.g. Jupyter): embed batches sequentially
+        order, batches = self._length_sorted_batches(texts)
+        embeddings = []
+        for batch in batches:
+            embeddings.extend(self._embed_batch(batch))
+        return self._unpermute(order, embeddings)
+    
+    def _invalidate_collection_caches(self, collection_name: str) -> None:
+        """Forget cached searches and ID listings of a collection after it is written to or deleted."""
+        self._query_cache.invalidate(collection_name)
+        self._chunk_ids_cache.pop(collection_name, None)
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Return embedding cache hit/miss counts and search cache hit/miss/eviction counts for this store."""
+        stats = self.embeddings.cache_stats()
+        stats.update({f'query_{name}': count for name, count in self._query_cache.stats().items()})
+        return stats
+    
+    def _to_array(self, embeddings: List[Any]) -> np.ndarray:
+        """Pack embeddings into one contiguous float32 array instead of lists of Python floats."""
+        if not embeddings:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def create_collection(self, collection_name: str, drop_if_exists: bool = False) -> Any:
+        """Create or get a vector collection."""
+        vx = get_vecs_client(self.supabase_url)
+        
+        if drop_if_exists:
+            try:
+                vx.delete_collection(collection_name)
+                print(f"🗑️  Deleted existing collection: {collection_name}")
+            except Exception:
+                pass  # Collection might not exist
+            self._delete_contents(vx, collection_name)
+        
+        collection = vx.get_or_create_collection(
+            name=collection_name,
+            dimension=self.dimension
+        )
+        
+        _invalidate_collections_cache()
+        self._invalidate_collection_caches(collection_name)
+        print(f"✅ Collection ready: {collection_name}")
+        return collection
+    
+    def store_structured_repo(self, repo_data: Dict[str, Any], refresh: bool = False,
+                              files: Optional[Iterable['FileChunk']] = None, bulk: bool = False) -> str:
         """
         Store structured repository data in vector database.
         
         Args:
             repo_data (Dict[str, Any]): Structured repository data
             refresh (bool): Whether to refresh existing collection
+            files (Optional[Iterable[FileChunk]]): Chunks to store, e.g. a generator;
+                defaults to repo_data['files'], which may itself be any iterable
+            bulk (bool): Drop the vector index for the load and rebuild it once at the end,
+                instead of maintaining it on every upsert
             
         Returns:
             str: Collection name
@@ -62,77 +423,259 @@ class StructuredVectorStore:
         repo_name = repo_data['repo_name']
         collection_name = repo_name  # Use simple repo name like old version
         
+        if files is None:
+            files = repo_data['files']
+        
+        # Generators have no length; progress is then reported without a total
+        total_chunks = len(files) if hasattr(files, '__len__') else None
+        
         print(f"📥 Storing structured repo: {repo_name}")
-        print(f"📊 Chunks to store: {len(repo_data['files'])}")
+        print(f"📊 Chunks to store: {total_chunks if total_chunks is not None else 'streamed'}")
         
-        # Create collection
+        # Create collection; its handle is used for every upsert below
         collection = self.create_collection(collection_name, drop_if_exists=refresh)
+        vx = get_vecs_client(self.supabase_url)
         
-        # Prepare vectors for upsert
-        vectors_to_upsert = []
+        # Embed and upsert in fixed-size batches so only one batch of chunks and vectors
+        # is held in memory at a time
+        files = iter(files)
         
-        for file_chunk in repo_data['files']:
+        if bulk:
+            self._drop_vector_indexes(vx, collection_name)
+        
+        try:
+            stored_count, unchanged_count = self._upsert_chunks(
+                vx, collection, repo_data, files, refresh, total_chunks
+            )
+        finally:
+            # Cached searches and ID listings may predate the new chunks
+            self._invalidate_collection_caches(collection_name)
+            # A bulk load must leave the index rebuilt even if it stopped part-way
+            if bulk:
+                self._ensure_vector_index(collection_name)
+        
+        if unchanged_count:
+            print(f"⏭️  Skipped {unchanged_count} unchanged chunks")
+        
+        if stored_count:
+            print(f"✅ Stored {stored_count} chunks in collection: {collection_name}")
+            if not bulk:
+                self._ensure_vector_index(collection_name)
+        elif not unchanged_count:
+            print("❌ No chunks to store")
+        
+        return collection_name
+    
+    def _upsert_chunks(self, vx: Any, collection: Any, repo_data: Dict[str, Any],
+                       files: Iterable['FileChunk'], refresh: bool,
+                       total_chunks: Optional[int]) -> Tuple[int, int]:
+        """
+        Embed and upsert chunks batch by batch.
+        
+        Returns:
+            Tuple[int, int]: Number of chunks stored and number skipped as unchanged
+        """
+        stored_count = 0
+        unchanged_count = 0
+        
+        def take_batch() -> List['FileChunk']:
+            return list(itertools.islice(files, UPSERT_BATCH_SIZE))
+        
+        # Pull the next batch from the file generator (parsing and chunking it) in the
+        # background while the current batch is embedded and upserted
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            next_batch = prefetcher.submit(take_batch)
+            while batch := next_batch.result():
+                next_batch = prefetcher.submit(take_batch)
+                stored, unchanged = self._upsert_batch(vx, collection, repo_data, batch, refresh)
+                stored_count += stored
+                unchanged_count += unchanged
+                if stored:
+                    print(f"   📦 Stored {stored_count}/{total_chunks or '?'} chunks")
+        
+        return stored_count, unchanged_count
+    
+    def _upsert_batch(self, vx: Any, collection: Any, repo_data: Dict[str, Any],
+                      batch: List['FileChunk'], refresh: bool) -> Tuple[int, int]:
+        """Embed and upsert one batch of chunks, skipping those that are unchanged."""
+        collection_name = collection.name
+        
+        # Skip chunks whose content is unchanged since they were last stored
+        content_hashes = [hashlib.sha256(file_chunk.content.encode('utf-8')).hexdigest()
+                          for file_chunk in batch]
+        existing_hashes = {} if refresh else self._get_content_hashes(vx, collection, batch)
+        changed = [(file_chunk, content_hash) for file_chunk, content_hash in zip(batch, content_hashes)
+                   if existing_hashes.get(file_chunk.id) != content_hash]
+        unchanged_count = len(batch) - len(changed)
+        if not changed:
+            return 0, unchanged_count
+        batch = [file_chunk for file_chunk, _ in changed]
+        
+        # Blank files and whitespace-only stubs carry no meaning worth an API call; they get
+        # the canonical empty-chunk embedding and never enter the request body
+        trivial = np.array([not file_chunk.content.strip() for file_chunk in batch])
+        embeddings = np.empty((len(batch), self.dimension), dtype=np.float32)
+        if trivial.any():
+            embeddings[trivial] = self._get_empty_chunk_embedding()
+        if not trivial.all():
+            # Embed chunk contents in concurrent batches instead of one request per chunk
+            embeddings[~trivial] = self.embed_documents(
+                [file_chunk.content for file_chunk, skip in zip(batch, trivial) if not skip]
+            )
+        # A chunk that failed to embed on its own is skipped rather than failing its batch
+        embedded = ~np.isnan(embeddings).any(axis=1)
+        
+        vectors_to_upsert = []
+        stored_chunks = []
+        for (file_chunk, content_hash), embedding, ok in zip(changed, embeddings, embedded):
+            if not ok:
+                print(f"⚠️  Skipping chunk {file_chunk.id}: embedding failed")
+                continue
             try:
-                # Generate embedding for chunk content
-                embedding = self.embeddings.embed_query(file_chunk['content'])
-                
-                # Store the embedding in the chunk data
-                file_chunk['embedding'] = embedding
-                
-                # Create the structured record matching your schema
-                structured_record = {
-                    'id': file_chunk['id'],  # File path (with #chunk_X if chunked)
-                    'repo_id': file_chunk['repo_id'],  # Repository name
-                    'chunk_id': file_chunk['chunk_id'],  # Chunk number or None
-                    'content': file_chunk['content'],  # Raw code text
-                    'embedding': embedding,  # Vector representation (already a list)
-                    'symbols': file_chunk['symbols'],  # Extracted symbols dict
-                    'imports': file_chunk['imports'],  # Import statements list
-                    'metadata': file_chunk['metadata']  # Language, size, timestamps
-                }
-                
-                # Add source-specific metadata
-                if repo_data.get('source_type') == 'github':
-                    structured_record['metadata']['source_url'] = repo_data.get('source_url', '')
-                elif repo_data.get('source_type') == 'azure_devops':
-                    structured_record['metadata']['organization'] = repo_data.get('organization', '')
-                    structured_record['metadata']['project'] = repo_data.get('project', '')
-                
-                # For vector storage, we still need the 3-field format but with all data in metadata
-                metadata_for_storage = {
-                    'repo_id': file_chunk['repo_id'],
-                    'chunk_id': file_chunk['chunk_id'],
-                    'content': file_chunk['content'],
-                    'symbols': json.dumps(file_chunk['symbols']),
-                    'imports': json.dumps(file_chunk['imports']),
-                    'metadata': json.dumps(file_chunk['metadata']),
-                    'repo_name': repo_data['repo_name'],
-                    'path': file_chunk['id']  # Store the full ID as path
-                }
-                
-                # Use chunk ID as vector ID
-                vectors_to_upsert.append((file_chunk['id'], embedding, metadata_for_storage))
-                
+                vectors_to_upsert.append(self._build_vector_record(file_chunk, embedding, repo_data, content_hash))
+                stored_chunks.append(file_chunk)
             except Exception as e:
-                print(f"⚠️  Error processing chunk {file_chunk['id']}: {e}")
+                print(f"⚠️  Error processing chunk {file_chunk.id}: {e}")
                 continue
         
-        # Upsert vectors
         if vectors_to_upsert:
-            vx = vecs.create_client(self.supabase_url)
-            try:
-                collection = vx.get_collection(collection_name)
-                collection.upsert(vectors_to_upsert)
-                print(f"✅ Stored {len(vectors_to_upsert)} chunks in collection: {collection_name}")
-            finally:
-                vx.disconnect()
-        else:
-            print("❌ No chunks to store")
+            self._store_contents(vx, collection_name, stored_chunks)
+            collection.upsert(vectors_to_upsert)
         
-        return collection_name
+        return len(vectors_to_upsert), unchanged_count
+    
+    def _get_content_hashes(self, vx: Any, collection: Any, file_chunks: List['FileChunk']) -> Dict[str, str]:
+        """Fetch the stored content hashes of the given chunks in one query."""
+        table = collection.table
+        stmt = select(table.c.id, table.c.metadata['sha256'].astext).where(
+            table.c.id.in_([file_chunk.id for file_chunk in file_chunks])
+        )
+        with vx.Session() as sess:
+            return {chunk_id: content_hash for chunk_id, content_hash in sess.execute(stmt) if content_hash}
+    
+    def _build_vector_record(self, file_chunk: 'FileChunk', embedding: np.ndarray,
+                             repo_data: Dict[str, Any],
+                             content_hash: Optional[str] = None) -> Tuple[str, np.ndarray, Dict[str, Any]]:
+        """Build the (id, vector, metadata) tuple upserted for a chunk."""
+        metadata = file_chunk.metadata
+        
+        # Add source-specific metadata
+        if repo_data.get('source_type') == 'github':
+            metadata['source_url'] = repo_data.get('source_url', '')
+        elif repo_data.get('source_type') == 'azure_devops':
+            metadata['organization'] = repo_data.get('organization', '')
+            metadata['project'] = repo_data.get('project', '')
+        
+        # For vector storage, we still need the 3-field format but with all data in metadata;
+        # nested values go in as JSON objects so the row is serialized once, not JSON-in-JSON
+        metadata_for_storage = {
+            'repo_id': file_chunk.repo_id,
+            'chunk_id': file_chunk.chunk_id,
+            'symbols': file_chunk.symbols,
+            'imports': file_chunk.imports,
+            'metadata': metadata,
+            'repo_name': repo_data['repo_name'],
+            'path': file_chunk.id,  # Store the full ID as path
+            'sha256': content_hash  # Lets re-ingests skip unchanged chunks
+        }
+        
+        # Use chunk ID as vector ID
+        return (file_chunk.id, embedding, metadata_for_storage)
+    
+    def _supports_halfvec(self, vx: Any) -> bool:
+        """Check once whether the database's pgvector has the halfvec type."""
+        if self._halfvec_supported is None:
+            with vx.Session() as sess:
+                version = sess.execute(
+                    text("select extversion from pg_extension where extname = 'vector'")
+                ).scalar()
+            parts = tuple(int(part) for part in version.split('.')[:3]) if version else ()
+            self._halfvec_supported = parts >= HALFVEC_MIN_VERSION
+        return self._halfvec_supported
+    
+    def _ensure_vector_index(self, collection_name: str) -> None:
+        """Build an HNSW cosine index on the collection if it does not have one yet."""
+        vx = get_vecs_client(self.supabase_url)
+        try:
+            collection = vx.get_collection(collection_name)
+            
+            if self._supports_halfvec(vx):
+                # Index the vectors as fp16: half the bytes read per HNSW traversal step,
+                # while the stored column stays full-precision vector for vecs
+                with vx.Session() as sess:
+                    with sess.begin():
+                        sess.execute(text(
+                            f'create index if not exists "ix_vector_halfvec_cosine_ops_hnsw_{collection_name}" '
+                            f'on vecs."{collection_name}" '
+                            f'using hnsw ((vec::halfvec({self.dimension})) halfvec_cosine_ops)'
+                        ))
+                print(f"🗂️  Vector index ready for collection: {collection_name}")
+            
+            # HNSW keeps itself up to date on later upserts, so it only needs building once
+            elif collection.index is None:
+                collection.create_index(
+                    measure=vecs.IndexMeasure.cosine_distance,
+                    method=vecs.IndexMethod.auto
+                )
+                print(f"🗂️  Created vector index for collection: {collection_name}")
+        except Exception as e:
+            print(f"⚠️  Could not create vector index: {e}")
+    
+    def _drop_vector_indexes(self, vx: Any, collection_name: str) -> None:
+        """Drop the collection's vector indexes ahead of a bulk load."""
+        with vx.Session() as sess:
+            with sess.begin():
+                index_names = sess.execute(
+                    text("select indexname from pg_indexes where schemaname = 'vecs' "
+                         "and tablename = :name and indexname like 'ix_vector%'"),
+                    {'name': collection_name}
+                ).scalars().all()
+                for index_name in index_names:
+                    sess.execute(text(f'drop index if exists vecs."{index_name}"'))
+        
+        if index_names:
+            print(f"🗑️  Dropped vector index for bulk load: {collection_name}")
+    
+    def ensure_vector_indexes(self) -> None:
+        """Rebuild vector indexes missing from any collection, e.g. after an interrupted bulk load."""
+        vx = get_vecs_client(self.supabase_url)
+        for collection in vx.list_collections():
+            if collection.index is None:
+                self._ensure_vector_index(collection.name)
+    
+    def _store_contents(self, vx: Any, collection_name: str, file_chunks: List['FileChunk']) -> None:
+        """Upsert chunk contents into the side table in one multi-row statement."""
+        rows = {file_chunk.id: file_chunk.content for file_chunk in file_chunks}
+        stmt = postgresql.insert(repo_files_table).values(
+            [{'repo': collection_name, 'path': path, 'content': content} for path, content in rows.items()]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[repo_files_table.c.repo, repo_files_table.c.path],
+            set_={'content': stmt.excluded.content}
+        )
+        with vx.Session() as sess:
+            with sess.begin():
+                sess.execute(stmt)
+    
+    def _with_contents(self, table: Any, collection_name: str, *columns: Any) -> Any:
+        """Select the given columns plus each chunk's content, joined from the side table."""
+        join_on = and_(repo_files_table.c.repo == collection_name, repo_files_table.c.path == table.c.id)
+        return select(*columns, repo_files_table.c.content).select_from(
+            table.outerjoin(repo_files_table, join_on)
+        )
+    
+    def _delete_contents(self, vx: Any, collection_name: str) -> None:
+        """Delete every stored content row of a collection."""
+        try:
+            with vx.Session() as sess:
+                with sess.begin():
+                    sess.execute(delete(repo_files_table).where(repo_files_table.c.repo == collection_name))
+        except Exception:
+            pass  # Side table might not exist yet
     
     def search_structured_repo(self, collection_name: str, query: str, 
-                              limit: int = 5, filters: Optional[Dict] = None) -> List[Dict]:
+                              limit: int = 5, filters: Optional[Dict] = None,
+                              with_content: bool = True) -> List[Dict]:
         """
         Search structured repository with optional filters.
         
@@ -141,63 +684,354 @@ class StructuredVectorStore:
             query (str): Search query
             limit (int): Maximum results
             filters (Optional[Dict]): Metadata filters
+            with_content (bool): Join each result's content; metadata-only callers skip it
             
         Returns:
             List[Dict]: Search results with structured data
         """
-        vx = vecs.create_client(self.supabase_url)
+        return self._search(collection_name, query, limit, filters, with_content=with_content)
+    
+    async def asearch_structured_repo(self, collection_name: str, query: str,
+                                      limit: int = 5, filters: Optional[Dict] = None,
+                                      with_content: bool = True) -> List[Dict]:
+        """
+        Async variant of search_structured_repo.
+        
+        The blocking query embedding and database round trip run on the search worker pool,
+        so the calling event loop can keep running other tool calls and LLM turns meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self._search, collection_name, query, limit, filters, with_content=with_content)
+        )
+    
+    def _search(self, collection_name: str, query: str, limit: int, filters: Optional[Dict] = None,
+                contains: Optional[Tuple[str, str]] = None, with_content: bool = True) -> List[Dict]:
+        """
+        Run a similarity search, optionally restricted to chunks whose stored metadata
+        field (e.g. 'symbols') contains a substring, case-insensitively.
+        
+        The restriction is applied in SQL before the top-K cut, so matching chunks are
+        not crowded out by more similar chunks that would be filtered away afterwards.
+        """
+        vx = get_vecs_client(self.supabase_url)
         
         try:
+            # Generate query embedding
+            query_embedding = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            
+            # A near-identical earlier query in the same scope answers without touching the database
+            scope = (collection_name, limit, orjson.dumps(filters, option=orjson.OPT_SORT_KEYS) if filters else None,
+                     contains, with_content)
+            # Read before querying, so results overtaken by a concurrent write are not cached
+            cache_version = self._query_cache.version(collection_name)
+            cached = self._query_cache.get(scope, query, query_embedding)
+            if cached is not None:
+                return cached
+            
             collection = vx.get_collection(collection_name)
+            table = collection.table
             
-            # Generate query embedding
-            query_embedding = self.embeddings.embed_query(query)
-            
-            # Perform search
-            results = collection.query(
-                data=query_embedding,
-                limit=limit,
-                include_value=True,
-                include_metadata=True,
-                filters=filters
-            )
+            # Rank server-side by cosine distance so the index is used; content is joined
+            # in the same query and the vectors themselves never come back over the wire
+            if self._supports_halfvec(vx):
+                # Match the fp16 expression index built at ingest time
+                distance = cast(table.c.vec, HALFVEC(self.dimension)).cosine_distance(query_embedding)
+            else:
+                distance = table.c.vec.cosine_distance(query_embedding)
+            columns = (table.c.id, table.c.metadata, (1 - distance).label('similarity'))
+            if with_content:
+                stmt = self._with_contents(table, collection_name, *columns)
+            else:
+                stmt = select(*columns, null())
+            stmt = stmt.order_by(distance).limit(limit)
+            
+            if filters:
+                stmt = stmt.where(build_filters(table.c.metadata, filters))
+            
+            if contains:
+                field, needle = contains
+                # Matched against the field's JSON text, where quotes and backslashes are escaped;
+                # this is a superset of exact matches, which callers classify afterwards.
+                # Legacy rows hold that JSON text as a string (written by json.dumps, so
+                # non-ASCII is escaped too); ->> unwraps it before matching
+                value = table.c.metadata[field]
+                stmt = stmt.where(or_(
+                    and_(func.jsonb_typeof(value) != 'string',
+                         cast(value, Text).icontains(json.dumps(needle, ensure_ascii=False)[1:-1], autoescape=True)),
+                    and_(func.jsonb_typeof(value) == 'string',
+                         value.astext.icontains(json.dumps(needle)[1:-1], autoescape=True))
+                ))
+            
+            with vx.Session() as sess:
+                results = sess.execute(stmt).fetchall()
             
             # Process results to match your schema
             structured_results = []
-            for result in results:
-                if len(result) >= 3:
-                    file_id = result[0]  # This is the file path (with #chunk_X if chunked)
-                    cosine_distance = result[1]  # Distance from vector search
-                    similarity_score = 1 - cosine_distance  # Convert distance to similarity
-                    stored_metadata = result[2]
-                    
-                    # Deserialize the stored data
-                    symbols = json.loads(stored_metadata.get('symbols', '{}'))
-                    imports = json.loads(stored_metadata.get('imports', '[]'))
-                    file_metadata = json.loads(stored_metadata.get('metadata', '{}'))
-                    
-                    # Return in your exact schema format
-                    structured_result = {
-                        'id': file_id,  # File path (same as old unstructured)
-                        'repo_id': stored_metadata.get('repo_id', ''),
-                        'chunk_id': stored_metadata.get('chunk_id'),
-                        'content': stored_metadata.get('content', ''),
-                        'embedding': None,  # Don't return the full vector in search results
-                        'symbols': symbols,
-                        'imports': imports,
-                        'metadata': file_metadata,
-                        'similarity_score': similarity_score  # Add for search results
-                    }
-                    
-                    structured_results.append(structured_result)
+            for file_id, stored_metadata, similarity_score, content in results:
+                # file_id is the file path (with #chunk_X if chunked)
+                structured_results.append(
+                    self._to_structured_result(file_id, stored_metadata, content, similarity_score)
+                )
             
+            self._query_cache.put(scope, query, query_embedding, structured_results, cache_version)
             return structured_results
             
         except Exception as e:
             print(f"❌ Search error: {e}")
             return []
-        finally:
-            vx.disconnect()
+    
+    def get_chunks_by_ids(self, collection_name: str, chunk_ids: List[str],
+                          with_content: bool = True) -> List[Dict]:
+        """
+        Fetch chunks by their IDs with a primary-key lookup (no embedding or similarity search).
+        
+        Args:
+            collection_name (str): Collection name
+            chunk_ids (List[str]): Chunk IDs (file paths, with #chunk_X if chunked)
+            with_content (bool): Join each chunk's content; metadata-only callers skip it
+            
+        Returns:
+            List[Dict]: Found chunks in structured format (missing IDs are omitted)
+        """
+        # Read before querying, so chunks overtaken by a concurrent write are not cached
+        version = self._query_cache.version(collection_name)
+        found, missing = self._cached_payloads(collection_name, chunk_ids, version, with_content)
+        if not missing:
+            return found
+        
+        try:
+            vx = get_vecs_client(self.supabase_url)
+            collection = vx.get_collection(collection_name)
+            table = collection.table
+            
+            # Select only id, metadata and (optionally) content so the vectors never cross the wire
+            if with_content:
+                stmt = self._with_contents(table, collection_name, table.c.id, table.c.metadata)
+            else:
+                stmt = select(table.c.id, table.c.metadata, null())
+            stmt = stmt.where(table.c.id.in_(missing))
+            with vx.Session() as sess:
+                rows = sess.execute(stmt).fetchall()
+            
+            fetched = [self._to_structured_result(file_id, stored_metadata, content)
+                       for file_id, stored_metadata, content in rows]
+            self._remember_payloads(collection_name, fetched, version, with_content)
+            return found + fetched
+            
+        except Exception as e:
+            print(f"❌ Fetch error: {e}")
+            # The chunks already held in memory are still valid
+            return found
+    
+    def _cached_payloads(self, collection_name: str, chunk_ids: List[str], version: int,
+                         with_content: bool) -> Tuple[List[Dict], List[str]]:
+        """Split chunk IDs into copies of the fresh chunks held in memory and the IDs still to fetch."""
+        found = []
+        missing = []
+        now = time.monotonic()
+        with self._payload_lock:
+            for chunk_id in dict.fromkeys(chunk_ids):
+                key = (collection_name, chunk_id)
+                cached = self._payload_cache.get(key)
+                # A chunk cached with its content also answers metadata-only lookups
+                if (cached is not None and now - cached[0] < CHUNK_PAYLOAD_CACHE_TTL
+                        and cached[1] == version and (cached[2] or not with_content)):
+                    self._payload_cache.move_to_end(key)
+                    found.append(dict(cached[3]))
+                else:
+                    missing.append(chunk_id)
+        return found, missing
+    
+    def _remember_payloads(self, collection_name: str, chunks: List[Dict], version: int,
+                           with_content: bool) -> None:
+        """Keep fetched chunks in memory, evicting the least recently used beyond CHUNK_PAYLOAD_CACHE_SIZE."""
+        now = time.monotonic()
+        with self._payload_lock:
+            for chunk in chunks:
+                key = (collection_name, chunk['id'])
+                cached = self._payload_cache.get(key)
+                # Never replace a fresh entry that has content with one that lacks it
+                if (cached is not None and now - cached[0] < CHUNK_PAYLOAD_CACHE_TTL
+                        and cached[1] == version and cached[2] and not with_content):
+                    continue
+                self._payload_cache[key] = (now, version, with_content, dict(chunk))
+                self._payload_cache.move_to_end(key)
+            while len(self._payload_cache) > CHUNK_PAYLOAD_CACHE_SIZE:
+                self._payload_cache.popitem(last=False)
+    
+    def list_chunk_ids(self, collection_name: str) -> List[str]:
+        """
+        List every chunk ID in a collection, reusing a listing younger than CHUNK_IDS_CACHE_TTL.
+        
+        Args:
+            collection_name (str): Collection name
+            
+        Returns:
+            List[str]: Sorted chunk IDs (file paths, with #chunk_X if chunked)
+        """
+        cached = self._chunk_ids_cache.get(collection_name)
+        if cached is not None and time.monotonic() - cached[0] < CHUNK_IDS_CACHE_TTL:
+            return list(cached[1])
+        
+        try:
+            chunk_ids = list(self.iter_chunk_ids(collection_name))
+            self._chunk_ids_cache[collection_name] = (time.monotonic(), chunk_ids)
+            return list(chunk_ids)
+            
+        except Exception as e:
+            print(f"❌ Listing error: {e}")
+            return []
+    
+    def iter_chunk_ids(self, collection_name: str, batch_size: int = CHUNK_ID_PAGE_SIZE) -> Iterator[str]:
+        """
+        Yield every chunk ID in a collection in sorted order, one page at a time,
+        so callers can stop early and only one page is held in memory.
+        
+        Args:
+            collection_name (str): Collection name
+            batch_size (int): IDs read per query
+            
+        Yields:
+            str: Chunk IDs (file paths, with #chunk_X if chunked)
+        """
+        vx = get_vecs_client(self.supabase_url)
+        table = vx.get_collection(collection_name).table
+        
+        # Keyset pagination over the primary-key index: each page starts after the last ID
+        # seen, so no page rescans the rows before it (unlike OFFSET)
+        last_id = None
+        while True:
+            stmt = select(table.c.id).order_by(table.c.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(table.c.id > last_id)
+            with vx.Session() as sess:
+                page = list(sess.execute(stmt).scalars())
+            yield from page
+            if len(page) < batch_size:
+                return
+            last_id = page[-1]
+    
+    def get_chunk_by_id(self, collection_name: str, chunk_id: str, with_content: bool = True) -> Optional[Dict]:
+        """
+        Fetch a single chunk by its ID.
+        
+        Args:
+            collection_name (str): Collection name
+            chunk_id (str): Chunk ID (file path, with #chunk_X if chunked)
+            with_content (bool): Join the chunk's content; metadata-only callers skip it
+            
+        Returns:
+            Optional[Dict]: The chunk in structured format, or None if not found
+        """
+        results = self.get_chunks_by_ids(collection_name, [chunk_id], with_content)
+        return results[0] if results else None
+    
+    def get_chunk_content(self, collection_name: str, chunk_id: str, start_line: int = 0,
+                          end_line: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a line range of a chunk's content, sliced in the database so only the
+        requested lines cross the wire.
+        
+        Args:
+            collection_name (str): Collection name
+            chunk_id (str): Chunk ID (file path, with #chunk_X if chunked)
+            start_line (int): First line to return, 0-based; negative values are clamped to 0
+            end_line (Optional[int]): Line to stop before; None reads to the end, and values
+                below start_line select nothing
+            
+        Returns:
+            Optional[Dict[str, Any]]: 'id', 'content' (the selected lines), 'start_line' and 'end_line'
+                (the bounds actually returned, clamped to the content) and 'total_lines',
+                or None if the chunk is not found
+        """
+        # Clamped before branching, so the cached, SQL and legacy paths slice identically;
+        # Python's negative-index slicing must never be reached
+        start_line = max(start_line, 0)
+        if end_line is not None:
+            end_line = max(end_line, start_line)
+        
+        # A chunk already held in memory is sliced locally, without a round trip
+        version = self._query_cache.version(collection_name)
+        found, _ = self._cached_payloads(collection_name, [chunk_id], version, with_content=True)
+        if found:
+            return self._line_range(chunk_id, found[0]['content'], start_line, end_line)
+        
+        vx = get_vecs_client(self.supabase_url)
+        
+        try:
+            table = vx.get_collection(collection_name).table
+            
+            lines = func.string_to_array(repo_files_table.c.content, '\n', type_=postgresql.ARRAY(Text))
+            total_lines = func.coalesce(func.cardinality(lines), 0)
+            # Postgres arrays are 1-based with inclusive bounds
+            upper = total_lines if end_line is None else end_line
+            join_on = and_(repo_files_table.c.repo == collection_name, repo_files_table.c.path == table.c.id)
+            stmt = select(
+                table.c.id,
+                func.array_to_string(lines[start_line + 1:upper], '\n'),
+                total_lines,
+                # Older collections kept the content inside the vector metadata
+                table.c.metadata['content'].astext
+            ).select_from(table.outerjoin(repo_files_table, join_on)).where(table.c.id == chunk_id)
+            
+            with vx.Session() as sess:
+                row = sess.execute(stmt).first()
+            if row is None:
+                return None
+            
+            file_id, content, total, legacy_content = row
+            if content is None and legacy_content is not None:
+                return self._line_range(file_id, legacy_content, start_line, end_line)
+            
+            return self._line_result(file_id, content or '', start_line, end_line, total)
+            
+        except Exception as e:
+            print(f"❌ Fetch error: {e}")
+            return None
+    
+    def _line_range(self, file_id: str, content: str, start_line: int, end_line: Optional[int]) -> Dict[str, Any]:
+        """Slice a line range out of content in Python; bounds must already be clamped."""
+        lines = content.split('\n') if content else []
+        return self._line_result(file_id, '\n'.join(lines[start_line:end_line]), start_line, end_line, len(lines))
+    
+    def _line_result(self, file_id: str, content: str, start_line: int, end_line: Optional[int],
+                     total: int) -> Dict[str, Any]:
+        """Build a get_chunk_content result, reporting the bounds clamped to the content."""
+        end_line = total if end_line is None else min(end_line, total)
+        return {
+            'id': file_id,
+            'content': content,
+            'start_line': min(start_line, end_line),
+            'end_line': end_line,
+            'total_lines': total
+        }
+    
+    def _to_structured_result(self, file_id: str, stored_metadata: Dict[str, Any], content: Optional[str] = None,
+                              similarity_score: Optional[float] = None) -> Dict[str, Any]:
+        """Deserialize a stored vector record into the structured chunk schema."""
+        symbols = _stored_json(stored_metadata.get('symbols'), {})
+        imports = _stored_json(stored_metadata.get('imports'), [])
+        file_metadata = _stored_json(stored_metadata.get('metadata'), {})
+        
+        # Return in your exact schema format
+        structured_result = {
+            'id': file_id,  # File path (same as old unstructured)
+            'repo_id': stored_metadata.get('repo_id', ''),
+            'chunk_id': stored_metadata.get('chunk_id'),
+            # Older collections kept the content inside the vector metadata
+            'content': content if content is not None else stored_metadata.get('content', ''),
+            'embedding': None,  # Don't return the full vector in search results
+            'symbols': symbols,
+            'imports': imports,
+            'metadata': file_metadata
+        }
+        
+        if similarity_score is not None:
+            structured_result['similarity_score'] = similarity_score  # Add for search results
+        
+        return structured_result
     
     def search_by_symbols(self, collection_name: str, symbol_type: str, 
                          symbol_name: str, limit: int = 10) -> List[Dict]:
@@ -213,18 +1047,20 @@ class StructuredVectorStore:
         Returns:
             List[Dict]: Chunks containing the symbol
         """
-        # Use semantic search with symbol-focused query
+        # Use semantic search with symbol-focused query, over chunks that mention the symbol
         query = f"{symbol_type} {symbol_name}"
-        results = self.search_structured_repo(collection_name, query, limit)
+        results = self._search(collection_name, query, limit, contains=('symbols', symbol_name))
         
         # Filter results that actually contain the symbol
+        # One compiled case-insensitive matcher instead of case-folding every haystack
+        matches = re.compile(re.escape(symbol_name), re.IGNORECASE).search
         filtered_results = []
         for result in results:
             symbols = result.get('symbols', {})
             if symbol_type in symbols and symbol_name in symbols[symbol_type]:
                 result['match_type'] = 'exact_symbol'
                 filtered_results.append(result)
-            elif any(symbol_name.lower() in str(v).lower() for v in symbols.values()):
+            elif any(matches(str(v)) for v in symbols.values()):
                 result['match_type'] = 'partial_symbol'
                 filtered_results.append(result)
         
@@ -244,13 +1080,14 @@ class StructuredVectorStore:
             List[Dict]: Chunks with matching imports
         """
         query = f"import {import_pattern}"
-        results = self.search_structured_repo(collection_name, query, limit)
+        results = self._search(collection_name, query, limit, contains=('imports', import_pattern))
         
         # Filter by actual imports
+        matches = re.compile(re.escape(import_pattern), re.IGNORECASE).search
         filtered_results = []
         for result in results:
             imports = result.get('imports', [])
-            if any(import_pattern.lower() in imp.lower() for imp in imports):
+            if any(matches(imp) for imp in imports):
                 result['match_type'] = 'import_match'
                 filtered_results.append(result)
         
@@ -266,76 +1103,40 @@ class StructuredVectorStore:
         Returns:
             Dict[str, Any]: Repository overview
         """
-        vx = vecs.create_client(self.supabase_url)
+        vx = get_vecs_client(self.supabase_url)
         
         try:
-            collection = vx.get_collection(collection_name)
+            vx.get_collection(collection_name)  # Clear error for unknown collections
             
-            # Get a sample of chunks to analyze
-            dummy_embedding = [0.0] * self.dimension
-            sample_results = collection.query(
-                data=dummy_embedding,
-                limit=100,
-                include_metadata=True
-            )
+            # Aggregate every stored chunk in one SQL round-trip; no vectors are read or compared
+            with vx.Session() as sess:
+                row = sess.execute(text(REPOSITORY_OVERVIEW_SQL.format(table=f'vecs."{collection_name}"'))).one()
             
-            if not sample_results:
+            total_chunks, unique_files, chunked_files, total_symbols, total_imports, languages, file_types = row
+            if not total_chunks:
                 return {'error': 'No data found in collection'}
             
-            # Analyze the sample
-            languages = {}
-            file_types = {}
-            total_symbols = 0
-            total_imports = 0
-            chunked_files = 0
-            unique_files = set()
-            
-            for result in sample_results:
-                if len(result) >= 3:
-                    metadata = result[2]
-                    
-                    # Language stats
-                    lang = metadata.get('language', 'unknown')
-                    languages[lang] = languages.get(lang, 0) + 1
-                    
-                    # File type stats
-                    ext = metadata.get('file_extension', 'unknown')
-                    file_types[ext] = file_types.get(ext, 0) + 1
-                    
-                    # Symbol and import stats
-                    total_symbols += metadata.get('symbol_count', 0)
-                    total_imports += metadata.get('import_count', 0)
-                    
-                    # Chunking stats
-                    if metadata.get('is_chunked', False):
-                        chunked_files += 1
-                    
-                    # Unique files
-                    unique_files.add(metadata.get('file_path', ''))
-            
             overview = {
                 'collection_name': collection_name,
-                'total_chunks': len(sample_results),
-                'unique_files': len(unique_files),
+                'total_chunks': total_chunks,
+                'unique_files': unique_files,
                 'chunked_files': chunked_files,
-                'languages': languages,
-                'file_types': file_types,
+                'languages': languages or {},
+                'file_types': file_types or {},
                 'total_symbols': total_symbols,
                 'total_imports': total_imports,
-                'avg_symbols_per_chunk': total_symbols / len(sample_results) if sample_results else 0,
-                'avg_imports_per_chunk': total_imports / len(sample_results) if sample_results else 0
+                'avg_symbols_per_chunk': total_symbols / total_chunks,
+                'avg_imports_per_chunk': total_imports / total_chunks
             }
             
             return overview
             
         except Exception as e:
             return {'error': str(e)}
-        finally:
-            vx.disconnect()
     
     def list_collections(self) -> List[str]:
         """List all available collections."""
-        vx = vecs.create_client(self.supabase_url)
+        vx = get_vecs_client(self.supabase_url)
         
         try:
             collections = vx.list_collections()
@@ -343,38 +1144,85 @@ class StructuredVectorStore:
         except Exception as e:
             print(f"Error listing collections: {e}")
             return []
-        finally:
-            vx.disconnect()
     
     def delete_collection(self, collection_name: str) -> bool:
         """Delete a collection."""
-        vx = vecs.create_client(self.supabase_url)
+        vx = get_vecs_client(self.supabase_url)
         
         try:
             vx.delete_collection(collection_name)
+            self._delete_contents(vx, collection_name)
+            _invalidate_collections_cache()
+            self._invalidate_collection_caches(collection_name)
             print(f"🗑️  Deleted collection: {collection_name}")
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
             return False
-        finally:
+
+
+@functools.lru_cache(maxsize=1)
+def get_default_store() -> StructuredVectorStore:
+    """Return the store shared by the module-level convenience functions."""
+    return StructuredVectorStore()
+
+
+def close_clients() -> None:
+    """Disconnect every cached database client, e.g. on shutdown."""
+    with _vecs_clients_lock:
+        for vx in _vecs_clients.values():
             vx.disconnect()
+        _vecs_clients.clear()
+    get_default_store.cache_clear()
 
 
 # Convenience functions
-def store_structured_repository(repo_data: Dict[str, Any], refresh: bool = False) -> str:
+def store_structured_repository(repo_data: Dict[str, Any], refresh: bool = False,
+                                bulk: bool = False) -> str:
     """
     Convenience function to store structured repository data.
     
     Args:
         repo_data (Dict[str, Any]): Structured repository data
         refresh (bool): Whether to refresh existing collection
+        bulk (bool): Rebuild the vector index once after loading instead of per upsert
         
     Returns:
         str: Collection name
     """
-    store = StructuredVectorStore()
-    return store.store_structured_repo(repo_data, refresh)
+    store = get_default_store()
+    return store.store_structured_repo(repo_data, refresh, bulk=bulk)
+
+
+async def store_many(repos: List[Dict[str, Any]], refresh: bool = False,
+                     concurrency: int = 4) -> List[Optional[str]]:
+    """
+    Store several repositories concurrently.
+    
+    Each ingest runs in a worker thread (so its own embedding batches still run
+    concurrently) and at most `concurrency` repositories are in flight at once.
+    All of them share the default store's database client and embedding model.
+    
+    Args:
+        repos (List[Dict[str, Any]]): Structured repository data, one per repository
+        refresh (bool): Whether to refresh existing collections
+        concurrency (int): Maximum number of repositories stored at once
+        
+    Returns:
+        List[Optional[str]]: Collection names in input order (None where storing failed)
+    """
+    store = get_default_store()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _bounded(repo_data: Dict[str, Any]) -> Optional[str]:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(store.store_structured_repo, repo_data, refresh)
+            except Exception as e:
+                print(f"❌ Failed to store {repo_data.get('repo_name')}: {e}")
+                return None
+    
+    return await asyncio.gather(*(_bounded(repo_data) for repo_data in repos))
 
 
 def search_structured_repository(collection_name: str, query: str, limit: int = 5) -> List[Dict]:
@@ -389,14 +1237,20 @@ def search_structured_repository(collection_name: str, query: str, limit: int =
     Returns:
         List[Dict]: Search results
     """
-    store = StructuredVectorStore()
+    store = get_default_store()
     return store.search_structured_repo(collection_name, query, limit)
 
 
 def get_structured_collections() -> List[str]:
-    """Get list of structured collections."""
-    store = StructuredVectorStore()
-    return store.list_collections()
+    """Get list of structured collections, reusing a listing younger than COLLECTIONS_CACHE_TTL."""
+    global _collections_cache
+    if _collections_cache is not None and time.monotonic() - _collections_cache[0] < COLLECTIONS_CACHE_TTL:
+        return list(_collections_cache[1])
+    
+    store = get_default_store()
+    collections = store.list_collections()
+    _collections_cache = (time.monotonic(), collections)
+    return list(collections)
 
 
 # Aliases for backward compatibility
@@ -415,8 +1269,7 @@ def list_repo_collections() -> List[str]:
 def get_vector_client():
     """Get vector client for backward compatibility."""
     try:
-        store = StructuredVectorStore()
-        return store
+        return get_default_store()
     except Exception as e:
         print(f"Error creating vector client: {e}")
         return None
@@ -424,8 +1277,7 @@ def get_vector_client():
 def get_embedding_model():
     """Get embedding model for backward compatibility."""
     try:
-        store = StructuredVectorStore()
-        return store.embeddings
+        return get_default_store().embeddings
     except Exception as e:
         print(f"Error creating embedding model: {e}")
         return None
@@ -443,7 +1295,7 @@ if __name__ == "__main__":
         'source_type': 'github',
         'source_url': 'https://github.com/test/repo',
         'branches': ['main', 'develop'],
-        'commit_count': 100,
+        'history_depth': 100,
         'chunks': [
             {
                 'id': 'chunk_123',
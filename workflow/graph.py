@@ -5,6 +5,7 @@ This module creates the LangGraph StateGraph that orchestrates the multi-agent
 code analysis workflow with proper node connections and routing.
 """
 
+import functools
 from typing import Dict, Any, Literal, Optional
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
@@ -61,9 +62,10 @@ def compile_workflow(workflow: StateGraph, use_memory: bool = True) -> Any:
     return compiled_workflow
 
 
+@functools.lru_cache(maxsize=1)
 def create_default_workflow() -> Any:
     """
-    Create and compile the default analysis workflow.
+    Create and compile the default analysis workflow, once per process.
     
     Returns:
         Compiled workflow ready for execution
@@ -6,11 +6,74 @@ This module contains the PR analysis agent node.
 
 from typing import Dict, Any
 import json
+import functools
 from langgraph.prebuilt import create_react_agent
 from .state import WorkflowState
 from .tools import create_tool_registry
 
 
+PR_ANALYSIS_PROMPT = """You are a Pull Request Analysis Agent.  
+Your job is to review code changes in a pull request (PR) for correctness, style, maintainability, and security risks.  
+Focus your analysis on the files and diffs provided in the PR, but use the available tools to explore the repository if you need more context.
+
+### Tools available:
+- `list_directories`: list all file paths in the repository.  
+- `get_metadata_by_id`: inspect metadata for a file without reading its full content.  
+- `get_content_by_id`: fetch the actual code of a file for deeper analysis.  
+- `get_metadata_by_ids` / `get_contents_by_ids`: the same for several files in one call.  
+- `search_vector_database`: search semantically for related files or concepts in the repo.  
+- `batch_search_vector_database`: run several such searches in one call.  
+
+### How you should work:
+1. Start with the PR's title, description, and the diff of changed files.  
+2. For each file:
+- Check whether the change introduces bugs, vulnerabilities, or regressions.  
+- Evaluate code quality (readability, maintainability, adherence to best practices).  
+- Verify that tests are updated or added if functionality changes.  
+3. If needed, use the tools to get additional context (e.g., fetch the full file or search related files).  
+When you need several independent lookups, request them together in one turn (or use the batch tools) rather than one at a time.  
+4. Provide your analysis in a structured format.
+
+### Output format:
+- **Summary:** High-level impression of the PR (e.g., "Good improvement, but missing test coverage").  
+- **Detailed Findings:** For each file/diff:
+- File path
+- Observed issues (bugs, vulnerabilities, style issues, missing docs/tests)
+- Suggested fixes or improvements
+- **Security Concerns:** Highlight any vulnerabilities (SQLi, XSS, insecure crypto, etc.).  
+- **Recommendation:** Final verdict (approve, approve with changes, request major changes).  
+
+You must base your analysis on actual PR content. If more context is needed, fetch it with the tools before making conclusions. Do not invent issues that are not supported by the code."""
+
+
+@functools.lru_cache(maxsize=1)
+def _get_agent() -> Any:
+    """Build the PR analysis agent once per process; tool schemas and the LLM client are reused."""
+    # Get available tools
+    tools = list(create_tool_registry().values())
+    
+    # Initialize LLM
+    from langchain_openai import ChatOpenAI
+
+    # 🤖 Your LLM of choice for code analysis and review
+    qwen_model = ChatOpenAI(
+        model="Areeb-Coder-FP8",
+        temperature=0,
+        streaming=True,  # Tool-call deltas are parsed as they arrive
+        timeout=60,
+        max_retries=2
+    )
+    # Let the model emit independent tool calls in one turn; the tool node runs them concurrently
+    model = qwen_model.bind_tools(tools, parallel_tool_calls=True)
+    
+    # Create the PR analysis agent
+    return create_react_agent(
+        model=model,
+        tools=tools,
+        prompt=PR_ANALYSIS_PROMPT
+    )
+
+
 def parse_pr_data(state: WorkflowState) -> WorkflowState:
     """
     Parse the PR JSON stored in state.pr_data and extract `collection_name`.
@@ -81,50 +144,7 @@ def pr_analysis_agent(state: WorkflowState) -> WorkflowState:
     print("🔍 [PR Analysis Agent] Starting PR analysis...")
     
     try:
-        # Get available tools
-        tools = list(create_tool_registry().values())
-        
-        # Initialize LLM
-        from langchain_openai import ChatOpenAI
-
-        qwen_model = ChatOpenAI(
-            model="Areeb-Coder-FP8",
-            """🤖 Your LLM of choice for code analysis and review.""" # type: ignore
-        )
-        # Create the PR analysis agent
-        agent = create_react_agent(
-            model=qwen_model,
-            tools=tools,
-            prompt="""You are a Pull Request Analysis Agent.  
-Your job is to review code changes in a pull request (PR) for correctness, style, maintainability, and security risks.  
-Focus your analysis on the files and diffs provided in the PR, but use the available tools to explore the repository if you need more context.
-
-### Tools available:
-- `list_directories`: list all file paths in the repository.  
-- `get_metadata_by_id`: inspect metadata for a file without reading its full content.  
-- `get_content_by_id`: fetch the actual code of a file for deeper analysis.  
-- `search_vector_database`: search semantically for related files or concepts in the repo.  
-
-### How you should work:
-1. Start with the PR's title, description, and the diff of changed files.  
-2. For each file:
-- Check whether the change introduces bugs, vulnerabilities, or regressions.  
-- Evaluate code quality (readability, maintainability, adherence to best practices).  
-- Verify that tests are updated or added if functionality changes.  
-3. If needed, use the tools to get additional context (e.g., fetch the full file or search related files).  
-4. Provide your analysis in a structured format.
-
-### Output format:
-- **Summary:** High-level impression of the PR (e.g., "Good improvement, but missing test coverage").  
-- **Detailed Findings:** For each file/diff:
-- File path
-- Observed issues (bugs, vulnerabilities, style issues, missing docs/tests)
-- Suggested fixes or improvements
-- **Security Concerns:** Highlight any vulnerabilities (SQLi, XSS, insecure crypto, etc.).  
-- **Recommendation:** Final verdict (approve, approve with changes, request major changes).  
-
-You must base your analysis on actual PR content. If more context is needed, fetch it with the tools before making conclusions. Do not invent issues that are not supported by the code."""
-        )
+        agent = _get_agent()
         
         # Get PR data from state
         pr_data = getattr(state, 'pr_data', '{}')
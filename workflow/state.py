@@ -6,11 +6,12 @@ throughout the PR analysis workflow.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from datetime import datetime
+import time
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowState:
     """
     Central state object for the PR analysis workflow.
@@ -26,7 +27,8 @@ class WorkflowState:
     
     # Workflow control
     current_step: str = "start"
-    completed_nodes: List[str] = field(default_factory=list)
+    completed_nodes: Set[str] = field(default_factory=set)
+    completion_order: List[str] = field(default_factory=list)  # Same nodes, in the order they finished
     
     # Analysis results
     analysis_response: Optional[str] = None
@@ -35,9 +37,11 @@ class WorkflowState:
     # Analysis metadata
     analysis_metadata: Dict[str, Any] = field(default_factory=dict)
     
-    # Execution tracking
+    # Execution tracking; wall-clock timestamps for display, monotonic clock readings for timing
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    start_perf: float = field(default_factory=time.monotonic)
+    end_perf: Optional[float] = None
     
     def __post_init__(self):
         """Initialize start time when state is created"""
@@ -47,7 +51,8 @@ class WorkflowState:
     def mark_node_complete(self, node_name: str) -> None:
         """Mark a workflow node as completed"""
         if node_name not in self.completed_nodes:
-            self.completed_nodes.append(node_name)
+            self.completed_nodes.add(node_name)
+            self.completion_order.append(node_name)
     
     def is_node_complete(self, node_name: str) -> bool:
         """Check if a workflow node has been completed"""
@@ -56,13 +61,15 @@ class WorkflowState:
     def finalize_analysis(self) -> None:
         """Mark the analysis as complete and set end time"""
         self.end_time = datetime.now()
+        self.end_perf = time.monotonic()
         self.current_step = "complete"
     
     @property
     def execution_time(self) -> Optional[float]:
         """Get the total execution time in seconds"""
-        if self.start_time and self.end_time:
-            return (self.end_time - self.start_time).total_seconds()
+        # Immune to wall-clock adjustments (e.g. NTP steps) during the run
+        if self.end_perf is not None:
+            return self.end_perf - self.start_perf
         return None
     
     @property
@@ -5,14 +5,46 @@ This module provides vector database query tools for the LangGraph agents.
 The agents will use these tools to gather information and perform their own analysis.
 """
 
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Mapping
 from langchain_core.tools import tool
 
 # Import the existing vector store
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
-from utils.vector_utils import StructuredVectorStore
+import asyncio
+import operator
+import threading
+from concurrent.futures import ThreadPoolExecutor
+_SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if _SRC_DIR not in sys.path:  # main.py may already have added it
+    sys.path.append(_SRC_DIR)
+from utils.vector_utils import StructuredVectorStore, get_default_store
+
+
+# Searches run at once by batch_search_vector_database
+BATCH_SEARCH_WORKERS = 4
+
+# Tools may run concurrently (parallel tool calls); only one thread builds the shared store
+_vector_store_lock = threading.Lock()
+
+
+def _get_vector_store() -> StructuredVectorStore:
+    """Return the store shared by every tool call, so clients and caches are set up once."""
+    with _vector_store_lock:
+        return get_default_store()
+
+
+def _describe_error(e: Exception) -> str:
+    """
+    Name an exception in one short line for the agent.
+    
+    str() of database errors appends the full SQL statement and its parameters, which
+    only costs prompt tokens; the first line of the message is what the model can act on.
+    """
+    message = e.args[0] if e.args and isinstance(e.args[0], str) else ''
+    first_line = message.strip().split('\n', 1)[0]
+    return f"{type(e).__name__}: {first_line}" if first_line else type(e).__name__
 
 
 # ============================================================================
@@ -31,22 +63,13 @@ def list_directories(collection_name: str) -> List[str]:
         List of chunk IDs (file paths/directories)
     """
     try:
-        vector_store = StructuredVectorStore()
-        
-        # Get a large sample to find all unique directories
-        results = vector_store.search_structured_repo(collection_name, "code", limit=1000)
+        vector_store = _get_vector_store()
         
-        # Extract unique chunk IDs (which are file paths)
-        chunk_ids = set()
-        for result in results:
-            chunk_id = result.get('id', '')
-            if chunk_id:
-                chunk_ids.add(chunk_id)
-        
-        return sorted(list(chunk_ids))
+        # IDs only, straight from the primary key; no similarity search or payloads
+        return vector_store.list_chunk_ids(collection_name)
         
     except Exception as e:
-        return [f'Error listing directories: {str(e)}']
+        return [f'Error listing directories: {_describe_error(e)}']
 
 
 @tool
@@ -62,64 +85,122 @@ def get_metadata_by_id(collection_name: str, chunk_id: str) -> Dict[str, Any]:
         Dictionary containing chunk metadata without content
     """
     try:
-        vector_store = StructuredVectorStore()
+        vector_store = _get_vector_store()
         
-        # Search for the specific chunk ID
-        results = vector_store.search_structured_repo(collection_name, chunk_id, limit=10)
+        # Direct lookup of the specific chunk ID; the content is not even fetched
+        result = vector_store.get_chunk_by_id(collection_name, chunk_id, with_content=False)
         
-        # Find exact match
-        for result in results:
-            if result.get('id') == chunk_id:
-                # Return metadata without content
-                metadata = {
-                    'id': result.get('id'),
-                    'repo_id': result.get('repo_id'),
-                    'chunk_id': result.get('chunk_id'),
-                    'symbols': result.get('symbols', {}),
-                    'imports': result.get('imports', []),
-                    'metadata': result.get('metadata', {}),
-                    'similarity_score': result.get('similarity_score', 0),
-                    'tool_used': 'get_metadata_by_id'
-                }
-                return metadata
+        if result:
+            # Return metadata without content
+            return _metadata_summary(result, 'get_metadata_by_id')
         
         return {'error': f'Chunk ID {chunk_id} not found', 'tool_used': 'get_metadata_by_id'}
         
     except Exception as e:
-        return {'error': f'Failed to get metadata: {str(e)}', 'tool_used': 'get_metadata_by_id'}
+        return {'error': f'Failed to get metadata: {_describe_error(e)}', 'tool_used': 'get_metadata_by_id'}
 
 
 @tool
-def get_content_by_id(collection_name: str, chunk_id: str) -> Dict[str, Any]:
+def get_content_by_id(collection_name: str, chunk_id: str, start_line: int = 0,
+                      end_line: Optional[int] = None) -> Dict[str, Any]:
     """
-    Get the content code of a chunk by its ID.
+    Get the content code of a chunk by its ID, optionally only a range of its lines.
+    For large files, read the part you need instead of the whole file.
     
     Args:
         collection_name: Name of the repository collection
         chunk_id: The chunk ID (file path) to get content for
+        start_line: First line to return, 0-based
+        end_line: Line to stop before; omit to read to the end
+        
+    Returns:
+        Dictionary containing the selected content, plus start_line and end_line (the bounds
+        actually returned, clamped to the file) and total_lines
+    """
+    try:
+        vector_store = _get_vector_store()
+        
+        # Direct lookup of the specific chunk ID, sliced before it leaves the database
+        result = vector_store.get_chunk_content(collection_name, chunk_id, start_line, end_line)
+        
+        if result:
+            return {**result, 'tool_used': 'get_content_by_id'}
+        
+        return {'error': f'Chunk ID {chunk_id} not found', 'tool_used': 'get_content_by_id'}
+        
+    except Exception as e:
+        return {'error': f'Failed to get content: {_describe_error(e)}', 'tool_used': 'get_content_by_id'}
+
+
+@tool
+def get_metadata_by_ids(collection_name: str, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Get metadata of several chunks by their IDs in a single lookup (excluding content).
+    Prefer this over repeated get_metadata_by_id calls when inspecting multiple files.
+    
+    Args:
+        collection_name: Name of the repository collection
+        chunk_ids: The chunk IDs (file paths) to get metadata for
+        
+    Returns:
+        List of chunk metadata dictionaries without content, in the order requested
+    """
+    try:
+        vector_store = _get_vector_store()
+        
+        # One primary-key query for every ID instead of one round trip each
+        found = {result.get('id'): result
+                 for result in vector_store.get_chunks_by_ids(collection_name, chunk_ids, with_content=False)}
+        
+        metadata_list = []
+        for chunk_id in chunk_ids:
+            result = found.get(chunk_id)
+            if result:
+                metadata_list.append(_metadata_summary(result, 'get_metadata_by_ids'))
+            else:
+                metadata_list.append({'error': f'Chunk ID {chunk_id} not found', 'tool_used': 'get_metadata_by_ids'})
+        
+        return metadata_list
+        
+    except Exception as e:
+        return [{'error': f'Failed to get metadata: {_describe_error(e)}', 'tool_used': 'get_metadata_by_ids'}]
+
+
+@tool
+def get_contents_by_ids(collection_name: str, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Get the content code of several chunks by their IDs in a single lookup.
+    Prefer this over repeated get_content_by_id calls when reading multiple files.
+    
+    Args:
+        collection_name: Name of the repository collection
+        chunk_ids: The chunk IDs (file paths) to get content for
         
     Returns:
-        Dictionary containing chunk content
+        List of chunk content dictionaries, in the order requested
     """
     try:
-        vector_store = StructuredVectorStore()
+        vector_store = _get_vector_store()
         
-        # Search for the specific chunk ID
-        results = vector_store.search_structured_repo(collection_name, chunk_id, limit=10)
+        # One primary-key query for every ID instead of one round trip each
+        found = {result.get('id'): result for result in vector_store.get_chunks_by_ids(collection_name, chunk_ids)}
         
-        # Find exact match
-        for result in results:
-            if result.get('id') == chunk_id:
-                return {
+        contents = []
+        for chunk_id in chunk_ids:
+            result = found.get(chunk_id)
+            if result:
+                contents.append({
                     'id': result.get('id'),
                     'content': result.get('content', ''),
-                    'tool_used': 'get_content_by_id'
-                }
+                    'tool_used': 'get_contents_by_ids'
+                })
+            else:
+                contents.append({'error': f'Chunk ID {chunk_id} not found', 'tool_used': 'get_contents_by_ids'})
         
-        return {'error': f'Chunk ID {chunk_id} not found', 'tool_used': 'get_content_by_id'}
+        return contents
         
     except Exception as e:
-        return {'error': f'Failed to get content: {str(e)}', 'tool_used': 'get_content_by_id'}
+        return [{'error': f'Failed to get content: {_describe_error(e)}', 'tool_used': 'get_contents_by_ids'}]
 
 
 @tool
@@ -136,60 +217,138 @@ def search_vector_database(collection_name: str, query: str, limit: int = 10) ->
         List of matching chunks with IDs and metadata (no content)
     """
     try:
-        vector_store = StructuredVectorStore()
-        results = vector_store.search_structured_repo(collection_name, query, limit)
+        vector_store = _get_vector_store()
+        # Content is not needed for the summaries, so it is never fetched
+        results = vector_store.search_structured_repo(collection_name, query, limit, with_content=False)
         
         # Return results with metadata but without content for efficiency
-        search_results = []
-        for result in results:
-            search_result = {
-                'id': result.get('id'),
-                'repo_id': result.get('repo_id'),
-                'chunk_id': result.get('chunk_id'),
-                'symbols': result.get('symbols', {}),
-                'imports': result.get('imports', []),
-                'metadata': result.get('metadata', {}),
-                'similarity_score': result.get('similarity_score', 0),
-                'tool_used': 'search_vector_database',
-                'search_query': query
-            }
-            search_results.append(search_result)
-        
-        return search_results
+        return [_search_result_summary(result, query, 'search_vector_database') for result in results]
+        
+    except Exception as e:
+        return [{'error': f'Search failed: {_describe_error(e)}', 'tool_used': 'search_vector_database'}]
+
+
+async def _asearch_vector_database(collection_name: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Async variant of search_vector_database, used when the agent runs via ainvoke/astream."""
+    try:
+        vector_store = _get_vector_store()
+        results = await vector_store.asearch_structured_repo(collection_name, query, limit, with_content=False)
+        return [_search_result_summary(result, query, 'search_vector_database') for result in results]
+        
+    except Exception as e:
+        return [{'error': f'Search failed: {_describe_error(e)}', 'tool_used': 'search_vector_database'}]
+
+
+# Async runs await the search instead of tying up a thread per call; sync runs are unchanged
+search_vector_database.coroutine = _asearch_vector_database
+
+
+@tool
+def batch_search_vector_database(collection_name: str, queries: List[str], limit: int = 10) -> List[List[Dict[str, Any]]]:
+    """
+    Run several searches of the vector database in one call.
+    Prefer this over repeated search_vector_database calls when looking up multiple concepts.
+    
+    Args:
+        collection_name: Name of the repository collection
+        queries: Search queries
+        limit: Maximum number of results to return per query
+        
+    Returns:
+        One list of matching chunks (IDs and metadata, no content) per query, in the order given
+    """
+    try:
+        vector_store = _get_vector_store()
+        
+        def search(query: str) -> List[Dict[str, Any]]:
+            results = vector_store.search_structured_repo(collection_name, query, limit, with_content=False)
+            return [_search_result_summary(result, query, 'batch_search_vector_database') for result in results]
+        
+        # Searches overlap their embedding and database round trips; repeats are served
+        # by the store's query cache
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_SEARCH_WORKERS, len(queries)))) as executor:
+            return list(executor.map(search, queries))
         
     except Exception as e:
-        return [{'error': f'Search failed: {str(e)}', 'tool_used': 'search_vector_database'}]
+        return [[{'error': f'Search failed: {_describe_error(e)}', 'tool_used': 'batch_search_vector_database'}]]
+
+
+async def _abatch_search_vector_database(collection_name: str, queries: List[str],
+                                         limit: int = 10) -> List[List[Dict[str, Any]]]:
+    """Async variant of batch_search_vector_database, used when the agent runs via ainvoke/astream."""
+    try:
+        vector_store = _get_vector_store()
+        
+        async def search(query: str) -> List[Dict[str, Any]]:
+            results = await vector_store.asearch_structured_repo(collection_name, query, limit, with_content=False)
+            return [_search_result_summary(result, query, 'batch_search_vector_database') for result in results]
+        
+        return list(await asyncio.gather(*(search(query) for query in queries)))
+        
+    except Exception as e:
+        return [[{'error': f'Search failed: {_describe_error(e)}', 'tool_used': 'batch_search_vector_database'}]]
+
+
+batch_search_vector_database.coroutine = _abatch_search_vector_database
+
+
+# Fields of a structured chunk returned to the agent; the vector store always sets all of them
+METADATA_FIELDS = ('id', 'repo_id', 'chunk_id', 'symbols', 'imports', 'metadata')
+SEARCH_RESULT_FIELDS = METADATA_FIELDS + ('similarity_score',)
+
+# Pull every field out in one C-level call instead of a chain of result.get() lookups
+_get_metadata_fields = operator.itemgetter(*METADATA_FIELDS)
+_get_search_result_fields = operator.itemgetter(*SEARCH_RESULT_FIELDS)
+
+
+def _metadata_summary(result: Dict[str, Any], tool_used: str) -> Dict[str, Any]:
+    """Strip a chunk down to its ID and metadata for the agent."""
+    summary = dict(zip(METADATA_FIELDS, _get_metadata_fields(result)))
+    summary['tool_used'] = tool_used
+    return summary
+
+
+def _search_result_summary(result: Dict[str, Any], query: str, tool_used: str) -> Dict[str, Any]:
+    """Strip a search result down to its ID, metadata and score for the agent."""
+    summary = dict(zip(SEARCH_RESULT_FIELDS, _get_search_result_fields(result)))
+    summary['tool_used'] = tool_used
+    summary['search_query'] = query
+    return summary
 
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def get_available_tools() -> List[str]:
+# Built once at import; the registry is a read-only view so callers cannot mutate the shared tool set
+TOOLS: Tuple[Any, ...] = (
+    list_directories,
+    get_metadata_by_id,
+    get_content_by_id,
+    get_metadata_by_ids,
+    get_contents_by_ids,
+    search_vector_database,
+    batch_search_vector_database
+)
+TOOL_REGISTRY: Mapping[str, Any] = MappingProxyType({analysis_tool.name: analysis_tool for analysis_tool in TOOLS})
+AVAILABLE_TOOLS: Tuple[str, ...] = tuple(TOOL_REGISTRY)
+
+
+def get_available_tools() -> Tuple[str, ...]:
     """
-    Get list of all available analysis tools.
+    Get the names of all available analysis tools.
     
     Returns:
-        List of tool names
+        Tuple of tool names
     """
-    return [
-        'list_directories',
-        'get_metadata_by_id',
-        'get_content_by_id',
-        'search_vector_database'
-    ]
+    return AVAILABLE_TOOLS
 
 
-def create_tool_registry() -> Dict[str, Any]:
+def create_tool_registry() -> Mapping[str, Any]:
     """
-    Create a registry of all available tools with their metadata.
+    Get the registry of all available tools.
     
     Returns:
-        Dictionary mapping tool names to tool functions
-    """
-    return {
-        'list_directories': list_directories,
-        'get_metadata_by_id': get_metadata_by_id,
-        'get_content_by_id': get_content_by_id,
-        'search_vector_database': search_vector_database
-    }
\ No newline at end of file
+        Read-only mapping of tool names to tool functions
+    """
+    return TOOL_REGISTRY